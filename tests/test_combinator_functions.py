@@ -0,0 +1,62 @@
+import pandas as pd
+from tool_code.combinator_functions import combine_scenario_pairs
+
+COLUMNS = ['Scenario Name', 'Reg-Class', 'Sales']
+
+
+def framework_oem_report():
+    return pd.DataFrame([['No Action', 'Passenger Car', 1.0],
+                         ['No Action', 'Light Truck', 2.0],
+                         ['Final', 'Passenger Car', 3.0]], columns=COLUMNS)
+
+
+def nonframework_oem_report():
+    return pd.DataFrame([['No Action', 'Passenger Car', 10.0],
+                         ['Final', 'Passenger Car', 30.0]], columns=COLUMNS)
+
+
+def test_combine_scenario_pairs():
+    return_df, pair_rows = combine_scenario_pairs(framework_oem_report(), nonframework_oem_report())
+    expected = pd.DataFrame([['No Action', 'Passenger Car', 1.0],
+                             ['No Action', 'Light Truck', 2.0],
+                             ['No Action', 'Passenger Car', 10.0],
+                             ['No Action_Final', 'Passenger Car', 1.0],
+                             ['No Action_Final', 'Light Truck', 2.0],
+                             ['No Action_Final', 'Passenger Car', 30.0],
+                             ['Final_No Action', 'Passenger Car', 3.0],
+                             ['Final_No Action', 'Passenger Car', 10.0],
+                             ['Final', 'Passenger Car', 3.0],
+                             ['Final', 'Passenger Car', 30.0]], columns=COLUMNS)
+    pd.testing.assert_frame_equal(return_df, expected)
+    assert pair_rows == [('No Action', 'No Action', 'No Action', 3), ('No Action_Final', 'No Action', 'Final', 3),
+                         ('Final_No Action', 'Final', 'No Action', 2), ('Final', 'Final', 'Final', 2)]
+
+
+def test_combine_scenario_pairs_of_categorical_columns():
+    framework_oem = framework_oem_report().astype({'Scenario Name': 'category', 'Reg-Class': 'category'})
+    nonframework_oem = nonframework_oem_report().astype({'Scenario Name': 'category', 'Reg-Class': 'category'})
+    return_df, pair_rows = combine_scenario_pairs(framework_oem, nonframework_oem)
+    assert return_df['Scenario Name'].cat.categories.tolist() == ['Final', 'Final_No Action', 'No Action', 'No Action_Final']
+    assert return_df['Scenario Name'].tolist() == ['No Action'] * 3 + ['No Action_Final'] * 3 + ['Final_No Action'] * 2 + ['Final'] * 2
+    assert isinstance(return_df['Reg-Class'].dtype, pd.CategoricalDtype)
+    assert return_df['Sales'].tolist() == [1.0, 2.0, 10.0, 1.0, 2.0, 30.0, 3.0, 10.0, 3.0, 30.0]
+
+
+def test_combine_scenario_pairs_builds_only_the_given_pairs():
+    scenario_pairs = [('Final', 'Final'), ('No Action', 'No Action'), ('Alt 1', 'Final')]
+    return_df, pair_rows = combine_scenario_pairs(framework_oem_report(), nonframework_oem_report(), scenario_pairs)
+    expected = pd.DataFrame([['Final', 'Passenger Car', 3.0],
+                             ['Final', 'Passenger Car', 30.0],
+                             ['No Action', 'Passenger Car', 1.0],
+                             ['No Action', 'Light Truck', 2.0],
+                             ['No Action', 'Passenger Car', 10.0]], columns=COLUMNS)
+    pd.testing.assert_frame_equal(return_df, expected)
+    assert pair_rows == [('Final', 'Final', 'Final', 2), ('No Action', 'No Action', 'No Action', 3)]
+
+
+def test_combine_scenario_pairs_builds_only_the_scenario_subset():
+    return_df, pair_rows = combine_scenario_pairs(framework_oem_report(), nonframework_oem_report(), scenario_subset=['Final_No Action'])
+    expected = pd.DataFrame([['Final_No Action', 'Passenger Car', 3.0],
+                             ['Final_No Action', 'Passenger Car', 10.0]], columns=COLUMNS)
+    pd.testing.assert_frame_equal(return_df, expected)
+    assert pair_rows == [('Final_No Action', 'Final', 'No Action', 2)]
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+from tool_code.cost_factors import CostFactors, EmissionCostFactors, rate_label, stream_label
+
+
+def test_as_of_lookup():
+    # factors given only every few years, as in the criteria cost factors input file
+    df = pd.DataFrame([[2020, 0.03, 'Passenger Car', 10.0, 1.0],
+                       [2020, 0.03, 'Light Truck', 20.0, 2.0],
+                       [2025, 0.03, 'Passenger Car', 30.0, 3.0],
+                       [2025, 0.03, 'Light Truck', 40.0, 4.0]],
+                      columns=['calendar_year', 'discount_rate', 'reg_class', 'pm25_tailpipe_USD_per_uston', 'nox_tailpipe_USD_per_uston'])
+    cost_factors = CostFactors(df, 'calendar_year', ['discount_rate', 'reg_class'], as_of=True)
+    result = cost_factors.lookup([2020, 2024, 2025, 2030, 2024], 0.03, ['Passenger Car', 'Passenger Car', 'Light Truck', 'Light Truck', 'Light Truck'])
+    expected = pd.DataFrame([[10.0, 1.0],
+                             [10.0, 1.0],
+                             [40.0, 4.0],
+                             [40.0, 4.0],
+                             [20.0, 2.0]], columns=['pm25_tailpipe_USD_per_uston', 'nox_tailpipe_USD_per_uston'])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_clamped_lookup():
+    df = pd.DataFrame({'Calendar Year': [2020, 2021, 2022], '2018 $ / barrel': [1.5, 2.5, 3.5]})
+    cost_factors = CostFactors(df, 'Calendar Year', clamp_to_last_year=True)
+    result = cost_factors.lookup([2022, 2020, 2023, 2040, 2021])
+    pd.testing.assert_frame_equal(result, pd.DataFrame({'2018 $ / barrel': [3.5, 1.5, 3.5, 3.5, 2.5]}))
+
+
+def test_lookup_of_missing_factors_raises():
+    df = pd.DataFrame({'Calendar Year': [2020, 2022, 2020], 'reg_class': ['Passenger Car', 'Passenger Car', 'Light Truck'], 'factor': [1.0, 2.0, 3.0]})
+    cost_factors = CostFactors(df, 'Calendar Year', ['reg_class'])
+    pd.testing.assert_frame_equal(cost_factors.lookup([2022, 2020], ['Passenger Car', 'Light Truck']), pd.DataFrame({'factor': [2.0, 3.0]}))
+    for years, reg_class in [([2021], 'Passenger Car'), ([2019], 'Passenger Car'), ([2023], 'Passenger Car'), ([2022], 'Light Truck'), ([2020], 'Van')]:
+        with pytest.raises(KeyError):
+            cost_factors.lookup(years, reg_class)
+
+
+def criteria_input(pollutants, discount_rates):
+    rows = [[2020, discount_rate, 'Passenger Car', 'Gasoline'] for discount_rate in discount_rates]
+    df = pd.DataFrame(rows, columns=['calendar_year', 'discount_rate', 'reg_class', 'fuel'])
+    return df.assign(**{f'{pollutant}_USD_per_uston': 1.0 for pollutant in pollutants})
+
+
+def scc_input(streams):
+    return pd.DataFrame({'year': [2020]}).assign(**{f'{pollutant}_{stream}_USD_per_metricton': 1.0 for pollutant in ['co2', 'ch4'] for stream in streams})
+
+
+def test_criteria_pollutants_keep_report_order():
+    criteria_df = criteria_input(['so2_upstream', 'so2_tailpipe', 'nox_upstream', 'nox_tailpipe', 'pm25_upstream', 'pm25_tailpipe'], [0.03])
+    assert EmissionCostFactors(criteria_df, scc_input(['3.0']), 'year').criteria_pollutants \
+        == ['pm25_tailpipe', 'pm25_upstream', 'nox_tailpipe', 'nox_upstream', 'so2_tailpipe', 'so2_upstream']
+
+
+def test_stream_labels():
+    assert [stream_label(stream) for stream in ['3.0', '2.5', '2.25', '3.0_95', '3.95']] == ['3.0', '2.5', '2.25', '3.0_95', '3.0_95']
+    assert [rate_label(rate) for rate in [0.03, 0.0225, 0.025, 0.12]] == ['3.0', '2.25', '2.5', '12.0']
+
+    emission_cost_factors = EmissionCostFactors(criteria_input(['pm25_tailpipe'], [0.0225, 0.07]), scc_input(['2.0', '3.0', '3.95']), 'year')
+    assert list(emission_cost_factors.criteria_streams) == ['2.25', '7.0']
+    assert emission_cost_factors.scc_streams == ['2.0', '3.0', '3.0_95']
+    assert emission_cost_factors.discount_rates() == {'3.0': 0.03, '2.0': 0.02, '2.25': 0.0225, '7.0': 0.07}
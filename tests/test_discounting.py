@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+import pandas as pd
+from tool_code.cost_factors import EmissionCostFactors
+from tool_code.discounting import emission_costs_by_discount_rate
+
+
+def test_emission_costs_by_discount_rate_matches_stream_labels():
+    criteria_df = pd.DataFrame({'calendar_year': [2020, 2020], 'discount_rate': [0.0225, 0.12], 'reg_class': ['Passenger Car'] * 2,
+                                'fuel': ['Gasoline'] * 2, 'pm25_tailpipe_USD_per_uston': [1.0, 1.0]})
+    scc_df = pd.DataFrame({'year': [2020], 'co2_2.0_USD_per_metricton': [1.0], 'co2_3.0_USD_per_metricton': [1.0], 'co2_3.95_USD_per_metricton': [1.0]})
+    emission_cost_factors = EmissionCostFactors(criteria_df, scc_df, 'year')
+    settings = SimpleNamespace(emission_cost_factors=emission_cost_factors, emission_discount_rates=emission_cost_factors.discount_rates(),
+                               social_criteria_benefit_args=['Criteria_Costs_2.25', 'Criteria_Costs_12.0'],
+                               social_scc_benefit_args=['GHG_Costs_2.0', 'GHG_Costs_3.0', 'GHG_Costs_3.0_95'])
+    args = ['Retail Fuel Outlay', 'PM25_Costs_tailpipe_2.25', 'PM25_Costs_tailpipe_12.0', 'Criteria_Costs_12.0', 'CO2_Costs_2.0', 'CO2_Costs_3.0',
+            'CO2_Costs_3.0_95', 'TotalBenefits_Criteria_Costs_2.25_GHG_Costs_3.0', 'NetBenefits_Criteria_Costs_12.0_GHG_Costs_2.0']
+    assert emission_costs_by_discount_rate(settings, args) == {0.03: ['CO2_Costs_3.0', 'CO2_Costs_3.0_95'],
+                                                               0.02: ['CO2_Costs_2.0'],
+                                                               0.0225: ['PM25_Costs_tailpipe_2.25'],
+                                                               0.12: ['PM25_Costs_tailpipe_12.0', 'Criteria_Costs_12.0']}
@@ -0,0 +1,70 @@
+import pandas as pd
+from tool_code.rollup import Rollup
+
+COLUMNS = ['Scenario Name', 'Reg-Class', 'Fuel Type', 'kVMT']
+
+
+def test_rollup_totals():
+    df = pd.DataFrame([['A', 'Car', 'Gas', 1.0],
+                       ['A', 'Car', 'EV', 2.0],
+                       ['A', 'Truck', 'Gas', 4.0],
+                       ['B', 'Car', 'Gas', 8.0],
+                       ['B', 'Truck', 'EV', 16.0]], columns=COLUMNS)
+    expected = pd.DataFrame([['A', 'Car', 'EV', 2.0],
+                             ['A', 'Car', 'Gas', 1.0],
+                             ['A', 'Truck', 'Gas', 4.0],
+                             ['B', 'Car', 'Gas', 8.0],
+                             ['B', 'Truck', 'EV', 16.0],
+                             ['A', 'TOTAL', 'EV', 2.0],
+                             ['A', 'TOTAL', 'Gas', 5.0],
+                             ['B', 'TOTAL', 'EV', 16.0],
+                             ['B', 'TOTAL', 'Gas', 8.0],
+                             ['A', 'Car', 'TOTAL', 3.0],
+                             ['A', 'Truck', 'TOTAL', 4.0],
+                             ['B', 'Car', 'TOTAL', 8.0],
+                             ['B', 'Truck', 'TOTAL', 16.0],
+                             ['A', 'TOTAL', 'TOTAL', 7.0],
+                             ['B', 'TOTAL', 'TOTAL', 24.0]], columns=COLUMNS)
+    rollup = Rollup(['Scenario Name'], ['Reg-Class', 'Fuel Type'], [['Fuel Type'], ['Reg-Class'], []])
+    pd.testing.assert_frame_equal(rollup.rollup(df), expected)
+
+
+def test_weighted_rollup_totals():
+    # the first two rows share a key so that the sum to the finest level is weighted too
+    columns = ['Scenario Name', 'Reg-Class', 'Fuel Type', 'Fleet', 'Average Age', 'kVMT']
+    df = pd.DataFrame([['A', 'Car', 'Gas', 10.0, 2.0, 100.0],
+                       ['A', 'Car', 'Gas', 10.0, 4.0, 50.0],
+                       ['A', 'Car', 'EV', 5.0, 1.0, 20.0],
+                       ['A', 'Truck', 'Gas', 15.0, 6.0, 300.0]], columns=columns)
+    expected = pd.DataFrame([['A', 'Car', 'EV', 5.0, 1.0, 20.0],
+                             ['A', 'Car', 'Gas', 20.0, 3.0, 150.0],
+                             ['A', 'Truck', 'Gas', 15.0, 6.0, 300.0],
+                             ['A', 'Car', 'TOTAL', 25.0, 2.6, 170.0],
+                             ['A', 'Truck', 'TOTAL', 15.0, 6.0, 300.0],
+                             ['A', 'TOTAL', 'TOTAL', 40.0, 3.875, 470.0]], columns=columns)
+    rollup = Rollup(['Scenario Name'], ['Reg-Class', 'Fuel Type'], [['Reg-Class'], []], weighted_args={'Average Age': 'Fleet'})
+    pd.testing.assert_frame_equal(rollup.rollup(df), expected)
+
+
+def test_rollup_keeps_rows_as_passed_when_not_aggregating():
+    df = pd.DataFrame([['B', 'Truck', 'EV', 16.0],
+                       ['A', 'Car', 'Gas', 1.0],
+                       ['A', 'Car', 'EV', 2.0]], columns=COLUMNS)
+    expected = pd.DataFrame([['B', 'Truck', 'EV', 16.0],
+                             ['A', 'Car', 'Gas', 1.0],
+                             ['A', 'Car', 'EV', 2.0],
+                             ['A', 'TOTAL', 'TOTAL', 3.0],
+                             ['B', 'TOTAL', 'TOTAL', 16.0]], columns=COLUMNS)
+    rollup = Rollup(['Scenario Name'], ['Reg-Class', 'Fuel Type'], [[]])
+    pd.testing.assert_frame_equal(rollup.rollup(df, aggregate=False), expected)
+
+
+def test_rollup_tags_levels():
+    df = pd.DataFrame([['A', 'Car', 'Gas', 1.0],
+                       ['A', 'Truck', 'EV', 2.0]], columns=COLUMNS)
+    expected = pd.DataFrame([['A', 'Car', 'Gas', 1.0, 0, False],
+                             ['A', 'Truck', 'EV', 2.0, 0, False],
+                             ['A', 'TOTAL', 'TOTAL', 3.0, 1, True]], columns=COLUMNS + Rollup.level_cols)
+    rollup = Rollup(['Scenario Name'], ['Reg-Class', 'Fuel Type'], [[]], tag_levels=True)
+    pd.testing.assert_frame_equal(rollup.rollup(df, aggregate=False), expected)
+    assert Rollup(['Scenario Name'], ['Reg-Class', 'Fuel Type'], [[]]).rollup(df).columns.tolist() == COLUMNS
@@ -1,6 +1,6 @@
 
 
-def calc_social_impacts(settings, dict_of_values):
+def calc_social_impacts(settings, dict_of_values, no_action):
     """
     Note:
         The CCEMS calculates, internal to CCEMS, terms referred to as "Total Social Benefits," "Total Social Costs" and "Net Social Benefits." The tool characterizes some parameters differently than does
@@ -14,17 +14,18 @@ def calc_social_impacts(settings, dict_of_values):
         non-framework OEMs meet SAFE standards and then the final standards for 2023 and later. The scenario reflecting the final standards contains the keyword "final" in the Scenario Name.
         These two scenarios should be chosen carefully from the output files to calculate any incremental costs, benefits and net benefits of the final standards (or alternative) relative to the no action case.
 
-        The dictionary key = (scenario_name, year, reg_class, discount_rate) or (scenario_name, model_year, age, calendar_year, reg_class, discount_rate)
+        The dictionary key = (scenario_id, year, reg_class, discount_rate) or (scenario_id, model_year, age, calendar_year, reg_class, discount_rate)
+        where scenario_id is the Scenario ID of the ScenarioDimension.
 
     Parameters:
         settings: The SetInputs class.\n
-        dict_of_values: A dictionary consisting of a 4 or 6 element key.
+        dict_of_values: A dictionary consisting of a 4 or 6 element key.\n
+        no_action: The Scenario ID of the settings.base_social_name scenario.
 
     Return:
         The passed dictionary updated with new costs, benefits and net benefits calculations relative to the base_social_name.
 
     """
-    no_action = settings.base_social_name
     base_key = ()
     delta_dict = dict()
     for key in dict_of_values.keys():
@@ -114,5 +115,20 @@ def calc_social_impacts(settings, dict_of_values):
     return dict_of_values
 
 
+def social_impact_args(settings):
+    """
+
+    Parameters:
+        settings: The SetInputs class.
+
+    Return:
+        A list of the args added by calc_social_impacts, in the order they are added.
+
+    """
+    social_benefit_args = [f'{benefits}_{arg_criteria}_{arg_scc}' for arg_criteria in settings.social_criteria_benefit_args
+                           for arg_scc in settings.social_scc_benefit_args for benefits in ['TotalBenefits', 'NetBenefits']]
+    return ['TotalFuelSavings', 'FatalityCosts_Net', 'Non-FatalCrashCosts_Net', 'TotalCosts', 'NonEmissionBenefits'] + social_benefit_args
+
+
 if __name__ == '__main__':
     print('This module does not run as a script.')
@@ -1,5 +1,196 @@
+import io
+import sys
+import numpy as np
 import pandas as pd
-from itertools import product
+from contextlib import contextmanager
+from itertools import product, repeat
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+# report files may be compressed; they are looked for in this order and are decompressed as they are parsed, never on disk
+report_file_extensions = ['.csv', '.csv.gz', '.csv.zst']
+
+
+class ColumnProjection:
+    """
+
+    The ColumnProjection class is passed to pd.read_csv as usecols so that columns not needed by a report class are never parsed. The Scenario and
+    Scenario Name columns are always kept since those are needed to scrub and combine every report.
+
+    Note:
+        A class, rather than a lambda, is used so that projections can be sent to worker processes and included in ingest cache keys.
+
+    """
+
+    def __init__(self, columns=None, exclude_columns=(), exclude_keywords=(), keep_keywords=()):
+        """
+
+        Parameters:
+            columns: A list of the only columns to read, or None to read all columns other than those excluded.\n
+            exclude_columns: A list of columns to exclude.\n
+            exclude_keywords: A list of keywords; columns containing any of them are excluded.\n
+            keep_keywords: A list of keywords; columns containing any of them are not excluded by exclude_keywords.
+
+        """
+        self.columns = sorted(set(columns) | {'Scenario', 'Scenario Name'}) if columns is not None else None
+        self.exclude_columns = sorted(exclude_columns)
+        self.exclude_keywords = sorted(exclude_keywords)
+        self.keep_keywords = sorted(keep_keywords)
+
+    def __call__(self, col):
+        if self.columns is not None:
+            return col in self.columns
+        if col in self.exclude_columns:
+            return False
+        if any([keyword in col for keyword in self.exclude_keywords]) and not any([keyword in col for keyword in self.keep_keywords]):
+            return False
+        return True
+
+    def __repr__(self):
+        return f'ColumnProjection({self.columns}, {self.exclude_columns}, {self.exclude_keywords}, {self.keep_keywords})'
+
+
+class GroupSum:
+    """
+
+    The GroupSum class folds each scrubbed chunk of a report file into a running groupby-sum so that peak memory is bounded by the aggregated report
+    rather than by the report file.
+
+    Note:
+        Only the group_keys and the summed measures are kept, so this is suitable for reports whose report class sums every measure over those keys.
+
+    """
+
+    def __init__(self, group_keys):
+        """
+
+        Parameters:
+            group_keys: A list of the columns to group by.
+
+        """
+        self.group_keys = group_keys
+
+    def reduce(self, df):
+        """
+
+        Parameters:
+            df: A DataFrame containing the group_keys.
+
+        Return:
+            A DataFrame of the sums of the passed DataFrame for each group_keys group.
+
+        """
+        return df.groupby(by=self.group_keys, as_index=False, sort=False, observed=True).sum()
+
+    def prepare(self, df):
+        """
+
+        Note:
+            Subclasses override this method to derive the group_keys and measures from the report columns before a chunk is summed.
+
+        Parameters:
+            df: A scrubbed chunk of the report.
+
+        Return:
+            The passed DataFrame.
+
+        """
+        return df
+
+    def fold(self, running_df, df):
+        """
+
+        Parameters:
+            running_df: The DataFrame returned by the prior fold, or None for the first chunk.\n
+            df: A scrubbed chunk of the report.
+
+        Return:
+            The running groupby-sum updated with the passed chunk.
+
+        """
+        df = self.prepare(df)
+        if running_df is None:
+            return self.reduce(df)
+        return self.reduce(concat_reports([running_df, df]))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.group_keys})'
+
+
+class RowFilter:
+    """
+
+    The RowFilter class collects the row predicates of a report (year ranges, allowed and excluded values and a subset of scenarios) so that they are
+    applied to each chunk as the report file is read rather than to the combined report.
+
+    Note:
+        Year ranges apply to the year-shifted years. As in the report classes, rows having NaN in a year range or allowed values column are dropped
+        while rows having NaN in an excluded values column are kept. A class is used so that filters can be sent to worker processes and included
+        in ingest cache keys.
+
+    """
+
+    def __init__(self, year_ranges=None, allowed_values=None, excluded_values=None, scenario_names=None):
+        """
+
+        Parameters:
+            year_ranges: A dictionary of {column: (first, last)} year ranges, where first or last may be None for an open range.\n
+            allowed_values: A dictionary of {column: list of values} of the only values to keep.\n
+            excluded_values: A dictionary of {column: list of values} of values to drop.\n
+            scenario_names: A list of the only (combined) scenario names to build, or None to build all scenarios.
+
+        """
+        self.year_ranges = year_ranges if year_ranges else dict()
+        self.allowed_values = allowed_values if allowed_values else dict()
+        self.excluded_values = excluded_values if excluded_values else dict()
+        self.scenario_names = sorted(scenario_names) if scenario_names else None
+
+    def apply(self, df, years_to_shift=0):
+        """
+
+        Parameters:
+            df: A scrubbed chunk of a report, before any year shift.\n
+            years_to_shift: The number of years by which the report will be shifted.
+
+        Return:
+            The rows of the passed DataFrame that pass the filter.
+
+        """
+        keep = pd.Series(True, index=df.index)
+        for col, (first, last) in self.year_ranges.items():
+            if col in df.columns:
+                if first is not None:
+                    keep &= df[col] + years_to_shift >= first
+                if last is not None:
+                    keep &= df[col] + years_to_shift <= last
+        for col, values in self.allowed_values.items():
+            if col in df.columns:
+                keep &= df[col].isin(values)
+        for col, values in self.excluded_values.items():
+            if col in df.columns:
+                keep &= ~df[col].isin(values)
+        if self.scenario_names is not None:
+            scenario_names = df['Scenario Name'].unique()
+            keep &= df['Scenario Name'].isin([name for name in scenario_names if self.may_pair_into(name)])
+        if keep.all():
+            return df
+        return pd.DataFrame(df.loc[keep, :])
+
+    def may_pair_into(self, scenario_name):
+        """
+
+        Parameters:
+            scenario_name: A Framework or NonFramework OEM scenario name.
+
+        Return:
+            True if the scenario could be part of a pairing in scenario_names (a pairing is named for its scenario if both scenarios are the same
+            and is named framework_nonframework otherwise).
+
+        """
+        return any([name == scenario_name or name.startswith(f'{scenario_name}_') or name.endswith(f'_{scenario_name}') for name in self.scenario_names])
+
+    def __repr__(self):
+        return f'RowFilter({self.year_ranges}, {self.allowed_values}, {self.excluded_values}, {self.scenario_names})'
 
 
 def check_scenario_name(df, scen_name):
@@ -89,47 +280,382 @@ def convert_to_ustons(settings, df):
     return df
 
 
-def read_files_and_combine_scenarios(settings, report_name):
+def pairing_name(framework_oem_scenario_name, nonframework_oem_scenario_name):
+    """
+
+    Parameters:
+        framework_oem_scenario_name: The name of the Framework OEM scenario of a pairing.\n
+        nonframework_oem_scenario_name: The name of the NonFramework OEM scenario of a pairing.
+
+    Return:
+        The name of the combined scenario; a pairing is named for its scenario if both scenarios are the same and is named framework_nonframework
+        otherwise.
+
+    """
+    if framework_oem_scenario_name == nonframework_oem_scenario_name:
+        return framework_oem_scenario_name
+    return f'{framework_oem_scenario_name}_{nonframework_oem_scenario_name}'
+
+
+def combine_scenario_pairs(framework_oem_report, nonframework_oem_report, scenario_pairs=None, scenario_subset=None):
+    """
+    Note:
+        This function builds each Framework OEM scenario and NonFramework OEM scenario pairing for a single model run. Rather than concatenating
+        a new DataFrame for each pairing, the row positions of each pairing are collected and the combined DataFrame is assembled once. Pairs that
+        name a scenario not found in the reports are reported and skipped.
+
+    Parameters:
+        framework_oem_report: A scrubbed DataFrame of the Framework OEM report.\n
+        nonframework_oem_report: A scrubbed DataFrame of the NonFramework OEM report.\n
+        scenario_pairs: A list of (framework_oem_scenario_name, nonframework_oem_scenario_name) tuples of the only pairings to build, or None to build
+        every pairing.\n
+        scenario_subset: A list of the only pairing names to build, or None to build pairings of any name.
+
+    Return:
+        A DataFrame of all scenario pairings for the model run and a list of (scenario_name, framework_oem_scenario_name,
+        nonframework_oem_scenario_name, rows) tuples giving the pairing and number of rows added for each scenario.
+
+    """
+    both_reports = concat_reports([framework_oem_report, nonframework_oem_report])
+    framework_oem_scenario_names = [name for name in framework_oem_report['Scenario Name'].unique()]
+    nonframework_oem_scenario_names = [name for name in nonframework_oem_report['Scenario Name'].unique()]
+    framework_oem_rows = framework_oem_report.groupby('Scenario Name', sort=False).indices
+    nonframework_oem_rows = nonframework_oem_report.groupby('Scenario Name', sort=False).indices
+    nonframework_oem_offset = len(framework_oem_report)
+
+    if scenario_pairs is None:
+        scenario_pairs = product(framework_oem_scenario_names, nonframework_oem_scenario_names)
+
+    positions, scenario_names, pair_rows = list(), list(), list()
+    for framework_oem_scenario_name, nonframework_oem_scenario_name in scenario_pairs:
+        if framework_oem_scenario_name not in framework_oem_rows or nonframework_oem_scenario_name not in nonframework_oem_rows:
+            print(f'Error:  Scenario pair "{framework_oem_scenario_name}", "{nonframework_oem_scenario_name}" is not in the reports and will be skipped')
+            continue
+        scenario_name = pairing_name(framework_oem_scenario_name, nonframework_oem_scenario_name)
+        if scenario_subset is not None and scenario_name not in scenario_subset:
+            continue
+        rows = np.concatenate([framework_oem_rows[framework_oem_scenario_name],
+                               nonframework_oem_rows[nonframework_oem_scenario_name] + nonframework_oem_offset])
+        positions.append(rows)
+        scenario_names.append(scenario_name)
+        pair_rows.append((scenario_name, framework_oem_scenario_name, nonframework_oem_scenario_name, len(rows)))
+
+    if not positions:
+        return both_reports.iloc[0:0].reset_index(drop=True), pair_rows
+
+    return_df = both_reports.take(np.concatenate(positions)).reset_index(drop=True)
+    pair_row_counts = [pair[-1] for pair in pair_rows]
+    if pd.api.types.is_categorical_dtype(both_reports['Scenario Name']):
+        categories = sorted(set(scenario_names))
+        codes = np.array([categories.index(scenario_name) for scenario_name in scenario_names])
+        return_df['Scenario Name'] = pd.Categorical.from_codes(np.repeat(codes, pair_row_counts), categories=categories)
+    else:
+        return_df['Scenario Name'] = np.repeat(np.array(scenario_names, dtype=object), pair_row_counts)
+
+    return return_df, pair_rows
+
+
+def find_report_file(run_path, report_name):
     """
+
+    Parameters:
+        run_path: The path to the reports-csv folder of a model run.\n
+        report_name: The name of the report.
+
+    Return:
+        The path to the report file, which may be compressed (see report_file_extensions); the uncompressed path is returned if no file is found so that
+        reading it raises the usual error.
+
+    """
+    for extension in report_file_extensions:
+        file = run_path / f'{report_name}{extension}'
+        if file.exists():
+            return file
+    return run_path / f'{report_name}.csv'
+
+
+@contextmanager
+def open_report(file):
+    """
+    Note:
+        pandas decompresses gzip files itself, as inferred from the file extension, but zstd files are stream-decompressed here using the zstandard
+        package since the pinned pandas does not support zstd. The zstandard package is needed only when zstd files are read.
+
+    Parameters:
+        file: The path to the report file.
+
+    Return:
+        The file path, or an open text stream of the decompressed file, to pass to pd.read_csv.
+
+    """
+    if file.name.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f'The zstandard package is needed to read {file}')
+        with open(file, 'rb') as compressed, zstandard.ZstdDecompressor().stream_reader(compressed) as decompressed:
+            yield io.TextIOWrapper(decompressed, encoding='utf-8')
+    else:
+        yield file
+
+
+def read_report(settings, run_path, report_name, years_to_shift, ingest_cache=None, usecols=None, aggregation=None, row_filter=None, chunksize=None):
+    """
+    Note:
+        The year shift is applied after the file is read (and aggregated, if applicable); since every row of a file is shifted by the same number of
+        years this gives the same result as shifting each chunk, and it allows the unshifted report to be cached. The row_filter compares years
+        against the shifted years so that entry is cached for each years_to_shift.
+
     Parameters:
         settings: The SetInputs class.\n
-        report_name: The name of the report(s) to read.
+        run_path: The path to the reports-csv folder of the Framework or NonFramework OEM model run.\n
+        report_name: The name of the report to read.\n
+        years_to_shift: An integer representing the number of years by which to shift the model output file's data for use in this tool.\n
+        ingest_cache: An IngestCache object, or None to always parse the CSV file.\n
+        usecols: A ColumnProjection of the columns to read, or None to read all columns.\n
+        aggregation: A GroupSum object to aggregate the file as it is read, or None to keep every row.\n
+        row_filter: A RowFilter object applied as the file is read, or None to keep every row.\n
+        chunksize: The number of rows to read per chunk, or None to read the whole file at once.
 
     Return:
-        A DataFrame that combines the Framework and NonFramework OEM scenario results for all runs in the model_runs_path_dict.
+        A DataFrame of the given report after scrubbing and, if applicable, filtering, aggregating and year shifting.
+
+    """
+    file = find_report_file(run_path, report_name)
+    if ingest_cache:
+        entry = ingest_cache.entry_path(file, settings.base_scenario_name, settings.report_schemas.get(report_name), usecols, aggregation,
+                                        row_filter, years_to_shift if row_filter else None)
+        df = ingest_cache.load(entry)
+        if df is None:
+            df = parse_report(settings, file, report_name, usecols, aggregation, row_filter, years_to_shift, chunksize)
+            try:
+                ingest_cache.store(entry, df)
+            except Exception as e:
+                print(f'Could not cache {file}: {e}')
+    else:
+        df = parse_report(settings, file, report_name, usecols, aggregation, row_filter, years_to_shift, chunksize)
+    # apply year shift if applicable
+    if years_to_shift:
+        df = do_year_shift(df, years_to_shift)
+    return df
+
+
+def parse_report(settings, file, report_name, usecols=None, aggregation=None, row_filter=None, years_to_shift=0, chunksize=None):
+    """
+    Note:
+        The file is read in chunks of chunksize rows, if given, and each chunk is scrubbed, filtered and, if applicable, folded into the aggregation
+        before the next chunk is read so that rows that are filtered out are never held in memory along with the rest of the report.
+
+    Parameters:
+        settings: The SetInputs class.\n
+        file: The path to the report file, which may be compressed.\n
+        report_name: The name of the report, used to find its schema in settings.report_schemas.\n
+        usecols: A ColumnProjection of the columns to read, or None to read all columns.\n
+        aggregation: A GroupSum object to aggregate the file as it is read, or None to keep every row.\n
+        row_filter: A RowFilter object applied as the file is read, or None to keep every row.\n
+        years_to_shift: The number of years by which the report will be shifted, used by the row_filter.\n
+        chunksize: The number of rows to read per chunk, or None to read the whole file at once.
+
+    Return:
+        A DataFrame of the given report file after scrubbing, filtering and aggregating if applicable, and applying the report schema, if there is one.
 
     """
-    return_df = pd.DataFrame()
-    for model_runs, files_to_combine in settings.model_runs_path_dict.items():
-        framework_oem_run = files_to_combine[0]
-        nonframework_oem_run = files_to_combine[1]
-        years_to_shift = files_to_combine[2]
-
-        framework_oem_report = pd.read_csv(framework_oem_run / f'{report_name}.csv')
-        check_scenario_name(framework_oem_report, settings.base_scenario_name)
-        framework_oem_report = scrub_data(settings, framework_oem_report)
-        framework_oem_scenario_names = [name for name in framework_oem_report['Scenario Name'].unique()]
-
-        nonframework_oem_report = pd.read_csv(nonframework_oem_run / f'{report_name}.csv')
-        check_scenario_name(nonframework_oem_report, settings.base_scenario_name)
-        nonframework_oem_report = scrub_data(settings, nonframework_oem_report)
-        nonframework_oem_scenario_names = [name for name in nonframework_oem_report['Scenario Name'].unique()]
-
-        for framework_oem_scenario_name, nonframework_oem_scenario_name in product(framework_oem_scenario_names, nonframework_oem_scenario_names):
-            framework = pd.DataFrame(framework_oem_report.loc[framework_oem_report['Scenario Name'] == framework_oem_scenario_name, :])
-            nonframework = pd.DataFrame(nonframework_oem_report.loc[nonframework_oem_report['Scenario Name'] == nonframework_oem_scenario_name, :])
-            scenario_df = pd.concat([framework, nonframework], axis=0, ignore_index=True)
-            if framework_oem_scenario_name == nonframework_oem_scenario_name:
-                scenario_name = framework_oem_scenario_name
+    schema = settings.report_schemas.get(report_name)
+    dtype = {col: 'category' for col in schema['dimensions']} if schema else None
+    df, chunks = None, list()
+    with open_report(file) as source:
+        if chunksize:
+            reader = pd.read_csv(source, dtype=dtype, usecols=usecols, chunksize=chunksize)
+        else:
+            reader = [pd.read_csv(source, dtype=dtype, usecols=usecols)]
+        for chunk_number, chunk in enumerate(reader):
+            if chunk_number == 0:
+                check_scenario_name(chunk, settings.base_scenario_name)
+            chunk = scrub_data(settings, chunk)
+            if row_filter:
+                chunk = row_filter.apply(chunk, years_to_shift)
+            # skip chunks holding only scrubbed or filtered records so that empty chunks do not change dtypes
+            if not len(chunk):
+                continue
+            if aggregation:
+                df = aggregation.fold(df, chunk)
             else:
-                scenario_name = f'{framework_oem_scenario_name}_{nonframework_oem_scenario_name}'
-            scenario_df['Scenario Name'] = scenario_name
-            # apply year shift if applicable
-            if years_to_shift:
-                scenario_df = do_year_shift(scenario_df, years_to_shift)
-            return_df = pd.concat([return_df, scenario_df], axis=0, ignore_index=True)
-
-    return_df = return_df.reset_index(drop=True)
+                chunks.append(chunk)
+    if chunks:
+        df = concat_reports(chunks) if len(chunks) > 1 else chunks[0]
+    if df is None:
+        with open_report(file) as source:
+            df = scrub_data(settings, pd.read_csv(source, dtype=dtype, usecols=usecols, nrows=0))
+        # an empty aggregated report still needs the columns derived by the aggregation
+        if aggregation:
+            df = aggregation.prepare(df)
+    df = df.reset_index(drop=True)
+    if schema:
+        df = apply_report_schema(df)
+    return df
+
+
+def apply_report_schema(df):
+    """
+    Note:
+        Categorical dimensions keep the categories of scrubbed records (e.g., the base_scenario_name) so those are removed here and the remaining
+        categories are sorted so that groupby results are ordered as they would be for object strings. Integer measures
+        are downcast to the narrowest integer dtype that holds their values; pandas sums them as int64 so totals are unaffected.
+
+    Parameters:
+        df: A scrubbed DataFrame read with categorical dimensions.
+
+    Return:
+        The passed DataFrame with unused categories removed and integer measures downcast.
+
+    """
+    for col in df.columns:
+        if pd.api.types.is_categorical_dtype(df[col]):
+            df[col] = df[col].cat.set_categories(sorted(df[col].dropna().unique()))
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def concat_reports(dfs):
+    """
+    Note:
+        pandas returns object columns when concatenating categoricals having different categories, so the categories of each categorical column are
+        first set to the sorted union of categories across the passed DataFrames. The passed DataFrames are modified.
+
+    Parameters:
+        dfs: A list of DataFrames to concatenate.
+
+    Return:
+        A single DataFrame with categorical columns preserved.
+
+    """
+    categorical_cols = list()
+    for df in dfs:
+        categorical_cols += [col for col in df.columns if pd.api.types.is_categorical_dtype(df[col]) and col not in categorical_cols]
+
+    for col in categorical_cols:
+        categories = set()
+        for df in dfs:
+            if col in df.columns:
+                values = df[col].cat.categories if pd.api.types.is_categorical_dtype(df[col]) else df[col].dropna().unique()
+                categories.update(values)
+        categories = sorted(categories)
+        for df in dfs:
+            if col in df.columns and not (pd.api.types.is_categorical_dtype(df[col]) and df[col].cat.categories.tolist() == categories):
+                df[col] = pd.Categorical(df[col], categories=categories)
+
+    return pd.concat(dfs, axis=0, ignore_index=True)
+
+
+def report_memory_usage(df):
+    """
+    Parameters:
+        df: A DataFrame read using its report schema.
+
+    Return:
+        The memory usage (bytes) of the passed DataFrame and an estimate of its memory usage had categoricals been read as object strings and integers as int64.
+
+    """
+    typed_bytes = df.memory_usage(deep=True, index=False).sum()
+    untyped_bytes = 0
+    for col in df.columns:
+        if pd.api.types.is_categorical_dtype(df[col]):
+            # each object entry is an 8 byte pointer to a Python string; the last entry is for NaN (code -1)
+            category_bytes = np.array([sys.getsizeof(category) for category in df[col].cat.categories] + [sys.getsizeof(np.nan)])
+            untyped_bytes += 8 * len(df) + category_bytes[df[col].cat.codes.values].sum()
+        elif pd.api.types.is_integer_dtype(df[col]):
+            untyped_bytes += 8 * len(df)
+        else:
+            untyped_bytes += df[col].memory_usage(deep=True, index=False)
+    return typed_bytes, untyped_bytes
+
+
+def read_model_run(settings, report_name, model_run, ingest_cache=None, usecols=None, aggregation=None, row_filter=None, chunksize=None):
+    """
+    Note:
+        This function reads, scrubs, year-shifts and combines the Framework and NonFramework OEM reports of a single model run. It is the unit of work
+        handed to each worker when reports are read in parallel. Only the pairings listed for the model run in settings.scenario_pairs are built, if
+        a scenario pairs file is used, and only those named in the scenario_names of the row_filter, if any. When an aggregation is passed, each
+        scenario pairing is also summed into a single fleet.
+
+    Parameters:
+        settings: The SetInputs class.\n
+        report_name: The name of the report to read.\n
+        model_run: The model_runs_path_dict key of the model run to read.\n
+        ingest_cache: An IngestCache object, or None to always parse the CSV files.\n
+        usecols: A ColumnProjection of the columns to read, or None to read all columns.\n
+        aggregation: A GroupSum object to aggregate the files as they are read, or None to keep every row.\n
+        row_filter: A RowFilter object applied as the files are read, or None to keep every row.\n
+        chunksize: The number of rows to read per chunk, or None to read whole files at once.
+
+    Return:
+        A DataFrame of all scenario pairings for the model run and the list of pairings and rows added returned by combine_scenario_pairs.
+
+    """
+    framework_oem_run, nonframework_oem_run, years_to_shift = settings.model_runs_path_dict[model_run]
+
+    framework_oem_report = read_report(settings, framework_oem_run, report_name, years_to_shift, ingest_cache, usecols, aggregation, row_filter, chunksize)
+    nonframework_oem_report = read_report(settings, nonframework_oem_run, report_name, years_to_shift, ingest_cache, usecols, aggregation, row_filter, chunksize)
+
+    scenario_pairs = settings.scenario_pairs[model_run] if settings.scenario_pairs is not None else None
+    scenario_subset = row_filter.scenario_names if row_filter else None
+    return_df, pair_rows = combine_scenario_pairs(framework_oem_report, nonframework_oem_report, scenario_pairs, scenario_subset)
+    if aggregation:
+        return_df = aggregation.reduce(return_df)
+
+    return return_df, pair_rows
+
+
+def read_files_and_combine_scenarios(settings, report_name, workers=1, ingest_cache=None, usecols=None, aggregation=None, row_filter=None, chunksize=None,
+                                     scenarios=None):
+    """
+    Note:
+        When workers is greater than 1, each model run is read in its own process. Results are always combined in model_runs_path_dict order so
+        the returned DataFrame is the same regardless of the number of workers. When an aggregation is passed, the returned DataFrame holds one row
+        per scenario and group_keys group.
+
+    Parameters:
+        settings: The SetInputs class.\n
+        report_name: The name of the report(s) to read.\n
+        workers: The number of processes to use for reading model runs (the ingest_workers runtime setting).\n
+        ingest_cache: An IngestCache object, or None to always parse the CSV files.\n
+        usecols: A ColumnProjection of the columns needed by the report class, or None to read all columns.\n
+        aggregation: A GroupSum object to aggregate the report files as they are read, or None to keep every row.\n
+        row_filter: A RowFilter object applied to each chunk as the report files are read, or None to keep every row.\n
+        chunksize: The number of rows to read per chunk (the ingest_chunksize runtime setting), or None to read whole files at once.\n
+        scenarios: A ScenarioDimension object to which each combined scenario is added, or None.
+
+    Return:
+        A DataFrame that combines the Framework and NonFramework OEM scenario results for all runs in the model_runs_path_dict.
+
+    """
+    model_runs = [model_run for model_run in settings.model_runs_path_dict.keys()]
+    if workers > 1 and len(model_runs) > 1:
+        # worker processes are spawned rather than forked since reports may be read on the prefetch thread while other threads are running
+        with ProcessPoolExecutor(max_workers=min(workers, len(model_runs)), mp_context=get_context('spawn')) as executor:
+            results = list(executor.map(read_model_run, repeat(settings), repeat(report_name), model_runs, repeat(ingest_cache), repeat(usecols),
+                                        repeat(aggregation), repeat(row_filter), repeat(chunksize)))
+    else:
+        results = [read_model_run(settings, report_name, model_run, ingest_cache, usecols, aggregation, row_filter, chunksize) for model_run in model_runs]
+
+    model_run_dfs = list()
+    for model_run, (model_run_df, pair_rows) in zip(model_runs, results):
+        model_run_dfs.append(model_run_df)
+        for scenario_name, framework_oem_scenario_name, nonframework_oem_scenario_name, rows in pair_rows:
+            print(f'    {report_name}, {model_run}: {scenario_name} added {rows} rows')
+            if scenarios is not None:
+                scenarios.add(scenario_name, framework_oem_scenario_name, nonframework_oem_scenario_name, model_run)
+
+    if not model_run_dfs:
+        return pd.DataFrame()
+
+    return_df = concat_reports(model_run_dfs)
+
+    if report_name in settings.report_schemas:
+        typed_bytes, untyped_bytes = report_memory_usage(return_df)
+        print(f'    {report_name}: {untyped_bytes / 1e6:,.1f} MB untyped, {typed_bytes / 1e6:,.1f} MB using the report schema '
+              f'({(untyped_bytes - typed_bytes) / 1e6:,.1f} MB saved)')
 
     return return_df
 
@@ -0,0 +1,349 @@
+import numpy as np
+import pandas as pd
+
+
+class CostFactors:
+    """
+
+    The CostFactors class compiles a cost factors input file into a year-indexed array, once when the inputs are read, so that the factors of any
+    number of rows are looked up at once by array indexing rather than by searching the years of the input file for each row.
+
+    Note:
+        The factors are held in an array of (key, year, factor) over every year from the first to the last year of the input file, so the position
+        of a year in that array is its offset from the first year. For an as-of input (e.g., the criteria cost factors, which are not given every
+        year), each year holds the factors of the latest year of the input file on or before it. For other inputs, years not in the input file have
+        no factors. Years after the last year of the input file are clamped to the last year when clamp_to_last_year is True, as they always are for
+        an as-of input. Years before the first year of the input file have no factors.
+
+    """
+
+    def __init__(self, df, year_col, key_cols=None, factor_cols=None, as_of=False, clamp_to_last_year=False):
+        """
+
+        Parameters:
+            df: A DataFrame of the cost factors input file.\n
+            year_col: The name of the calendar year column.\n
+            key_cols: A list of the columns other than the year that key the factors (e.g., the discount rate, reg class and fuel), or None.\n
+            factor_cols: A list of the factor columns, or None for every column other than the year and key columns.\n
+            as_of: True to look up the factors of the latest year on or before each year.\n
+            clamp_to_last_year: True to look up the factors of the last year for years after it.
+
+        """
+        self.year_col = year_col
+        self.key_cols = key_cols if key_cols else list()
+        self.factor_cols = factor_cols if factor_cols else [col for col in df.columns if col not in [year_col] + self.key_cols]
+        self.clamp_to_last_year = clamp_to_last_year or as_of
+
+        if df.duplicated(subset=[year_col] + self.key_cols).any():
+            raise ValueError(f'Cost factors are not unique by {[year_col] + self.key_cols}')
+
+        input_years = df[year_col].to_numpy(dtype=int)
+        self.first_year, self.last_year = input_years.min(), input_years.max()
+        years = np.arange(self.first_year, self.last_year + 1)
+
+        if self.key_cols:
+            self.keys = pd.MultiIndex.from_frame(df[self.key_cols].drop_duplicates())
+            key_positions = self.keys.get_indexer(pd.MultiIndex.from_frame(df[self.key_cols]))
+        else:
+            self.keys = None
+            key_positions = np.zeros(len(df), dtype=int)
+
+        self.values = np.full((len(self.keys) if self.key_cols else 1, len(years), len(self.factor_cols)), np.nan)
+        self.present = np.zeros(self.values.shape[:2], dtype=bool)
+        self.values[key_positions, input_years - self.first_year] = df[self.factor_cols].to_numpy(dtype=float)
+        self.present[key_positions, input_years - self.first_year] = True
+
+        # the position in the year axis of the factors used for each year
+        if as_of:
+            unique_input_years = np.unique(input_years)
+            self.year_positions = unique_input_years[np.searchsorted(unique_input_years, years, side='right') - 1] - self.first_year
+        else:
+            self.year_positions = years - self.first_year
+
+    def year_positions_of(self, years):
+        """
+
+        Parameters:
+            years: An array of calendar years.
+
+        Return:
+            An array of the position in the year axis of the factors of each year, or -1 for years with no factors.
+
+        """
+        offsets = np.asarray(years, dtype=int) - self.first_year
+        if self.clamp_to_last_year:
+            offsets = np.minimum(offsets, len(self.year_positions) - 1)
+        in_range = (offsets >= 0) & (offsets < len(self.year_positions))
+        return np.where(in_range, self.year_positions[np.clip(offsets, 0, len(self.year_positions) - 1)], -1)
+
+    def key_positions_of(self, length, *keys):
+        """
+
+        Parameters:
+            length: The number of rows looked up.\n
+            keys: An array or a single value of each key column, in the order of the key columns.
+
+        Return:
+            An array of the position in the key axis of the key of each row, or -1 for keys not in the input file.
+
+        """
+        if not self.key_cols:
+            return np.zeros(length, dtype=int)
+        key_arrays = [np.full(length, key, dtype=object) if np.ndim(key) == 0 else np.asarray(key, dtype=object) for key in keys]
+        return self.keys.get_indexer(pd.MultiIndex.from_arrays(key_arrays))
+
+    def lookup(self, years, *keys):
+        """
+
+        Parameters:
+            years: An array of calendar years.\n
+            keys: An array (aligned with years) or a single value of each key column, in the order of the key columns.
+
+        Return:
+            A DataFrame of the factor columns of each year and key; a KeyError naming the years and keys with no factors is raised if there are any.
+
+        """
+        years = np.asarray(years, dtype=int)
+        year_positions = self.year_positions_of(years)
+        key_positions = self.key_positions_of(len(years), *keys)
+        found = (year_positions >= 0) & (key_positions >= 0)
+        found[found] = self.present[key_positions[found], year_positions[found]]
+        if not found.all():
+            missing = pd.DataFrame(dict(zip([self.year_col] + self.key_cols, [years] + [np.broadcast_to(key, years.shape) for key in keys])))
+            missing_keys = missing.loc[~found, :].drop_duplicates().itertuples(index=False, name=None)
+            raise KeyError(f'No cost factors for ({", ".join([self.year_col] + self.key_cols)}) {list(missing_keys)[:10]}')
+        return pd.DataFrame(self.values[key_positions, year_positions], columns=self.factor_cols)
+
+
+# the 3.95 stream of the scc cost factors input file is the 95th percentile of the 3 percent stream
+percentile_stream_aliases = {'3.95': '3.0_95'}
+
+# the criteria pollutants, by {pollutant}_{source}, in the order of the criteria cost columns of the reports
+criteria_pollutant_order = ['pm25_tailpipe', 'pm25_upstream', 'nox_tailpipe', 'nox_upstream', 'so2_tailpipe', 'so2_upstream']
+
+
+def stream_label(stream):
+    """
+
+    Parameters:
+        stream: The discount rate/estimation stream of a factor column of the scc cost factors input file (e.g., '3.0', '3.0_95' or '3.95').
+
+    Return:
+        The label of the stream in the cost args. A percentile stream is given as {rate}_{percentile} (e.g., '3.0_95', the 95th percentile of the
+        3 percent stream) and is returned as passed, as is any other stream (e.g., '2.5'), other than the streams of percentile_stream_aliases
+        (e.g., '3.95' is labeled '3.0_95').
+
+    """
+    return percentile_stream_aliases.get(stream, stream)
+
+
+def rate_label(rate):
+    """
+
+    Parameters:
+        rate: A discount rate (e.g., 0.03 or 0.0225).
+
+    Return:
+        The label of the rate in the cost args, the rate in percent with at least one decimal (e.g., '3.0' or '2.25').
+
+    """
+    label = f'{round(rate * 100, 4):.4f}'.rstrip('0')
+    return label + '0' if label.endswith('.') else label
+
+
+def stream_discount_rate(label):
+    """
+
+    Parameters:
+        label: The label of a stream in the cost args (e.g., '3.0' or '3.0_95').
+
+    Return:
+        The discount rate of the stream (e.g., 0.03).
+
+    """
+    return round(float(label.split('_')[0]) / 100, 6)
+
+
+class EmissionCostFactors:
+    """
+
+    The EmissionCostFactors class defines the valuation of emissions as a (pollutant, stream) tensor of $/ton factors read from the criteria and scc
+    cost factors input files, so that the damages of every valuation stream are calculated in a single pass over the inventory. Adding a stream is a
+    matter of adding its factors to an input file.
+
+    Note:
+        The criteria pollutants are the factor columns of the criteria cost factors input file, named {pollutant}_{source}_USD_per_uston, in the
+        order of criteria_pollutant_order whatever their order in the file, and the criteria streams are its discount rates. The GHG pollutants and streams are the factor columns of the scc cost factors input file, named
+        {pollutant}_{stream}_USD_per_metricton (see stream_label for how streams are labeled in the cost args). Every GHG must have factors for
+        every stream.
+
+    """
+
+    def __init__(self, criteria_df, scc_df, scc_year_col):
+        """
+
+        Parameters:
+            criteria_df: A DataFrame of the criteria cost factors input file.\n
+            scc_df: A DataFrame of the scc cost factors input file.\n
+            scc_year_col: The name of the calendar year column of the scc cost factors input file.
+
+        """
+        criteria_cols = [col for col in criteria_df.columns if col.endswith('_USD_per_uston')]
+        criteria_cols = sorted(criteria_cols, key=lambda col: criteria_pollutant_order.index(col[:-len('_USD_per_uston')])
+                               if col[:-len('_USD_per_uston')] in criteria_pollutant_order else len(criteria_pollutant_order))
+        self.criteria_cost_factors = CostFactors(criteria_df, 'calendar_year', ['discount_rate', 'reg_class', 'fuel'], criteria_cols, as_of=True)
+        self.criteria_pollutants = [col[:-len('_USD_per_uston')] for col in criteria_cols]
+        self.criteria_streams = {rate_label(rate): rate for rate in sorted(criteria_df['discount_rate'].unique())}
+
+        scc_cols = [col for col in scc_df.columns if col.endswith('_USD_per_metricton')]
+        self.scc_cost_factors = CostFactors(scc_df, scc_year_col, factor_cols=scc_cols)
+        pollutant_streams = [col[:-len('_USD_per_metricton')].split('_', 1) for col in scc_cols]
+        self.scc_pollutants = list(dict.fromkeys(pollutant for pollutant, stream in pollutant_streams))
+        self.scc_streams = list(dict.fromkeys(stream_label(stream) for pollutant, stream in pollutant_streams))
+        positions = {(pollutant, stream_label(stream)): position for position, (pollutant, stream) in enumerate(pollutant_streams)}
+        missing = [(pollutant, stream) for pollutant in self.scc_pollutants for stream in self.scc_streams if (pollutant, stream) not in positions]
+        if missing:
+            raise ValueError(f'The scc cost factors have no factors for (pollutant, stream) {missing}')
+        self.scc_factor_positions = np.array([[positions[pollutant, stream] for stream in self.scc_streams] for pollutant in self.scc_pollutants])
+
+    def criteria_tensor(self, years, reg_classes, fuels):
+        """
+
+        Parameters:
+            years: An array of calendar years.\n
+            reg_classes: An array of reg classes aligned with years.\n
+            fuels: An array of the fuels of the criteria cost factors aligned with years.
+
+        Return:
+            An array of (row, criteria pollutant, criteria stream) of the criteria cost factors (dollars/ton) of each row.
+
+        """
+        return np.stack([self.criteria_cost_factors.lookup(years, rate, reg_classes, fuels).to_numpy()
+                         for rate in self.criteria_streams.values()], axis=2)
+
+    def scc_tensor(self, years):
+        """
+
+        Parameters:
+            years: An array of calendar years.
+
+        Return:
+            An array of (row, GHG pollutant, scc stream) of the social cost of GHG cost factors (dollars/metric ton) of each row.
+
+        """
+        return self.scc_cost_factors.lookup(years).to_numpy()[:, self.scc_factor_positions]
+
+    def discount_rates(self):
+        """
+
+        Return:
+            A dictionary of {rate label: discount rate} of the discount rates of the criteria and scc streams, with the 3 percent rate first and the
+            others in ascending order as the emission costs have always been ordered in the annualized reports. Emission costs are discounted only at
+            the rate of their stream.
+
+        """
+        rates = set(self.stream_discount_rates().values())
+        return {rate_label(rate): rate for rate in sorted(rates, key=lambda rate: (rate != 0.03, rate))}
+
+    def stream_discount_rates(self):
+        """
+
+        Return:
+            A dictionary of {stream label: discount rate} of the criteria and scc streams (e.g., {'3.0': 0.03, '3.0_95': 0.03}).
+
+        """
+        return {label: stream_discount_rate(label) for label in list(self.criteria_streams) + self.scc_streams}
+
+
+class EmissionCostFactorDraws:
+    """
+
+    The EmissionCostFactorDraws class holds draws of the criteria and scc cost factors for the uncertainty report, compiled as the central factors are
+    (see EmissionCostFactors) with the draw as an extra key, so that the damages of every draw are valued at once along a draw axis.
+
+    Note:
+        The draws input files have the columns of the central cost factors input files along with a draw column. Factors without a draws input file
+        are the central factors in every draw. When both draws input files are given, they must have the same draws.
+
+    """
+
+    def __init__(self, emission_cost_factors, criteria_draws_df=None, scc_draws_df=None, scc_year_col=None):
+        """
+
+        Parameters:
+            emission_cost_factors: The EmissionCostFactors of the central cost factors.\n
+            criteria_draws_df: A DataFrame of the criteria cost factors draws input file, or None.\n
+            scc_draws_df: A DataFrame of the scc cost factors draws input file, or None.\n
+            scc_year_col: The name of the calendar year column of the scc cost factors draws input file.
+
+        """
+        self.central = emission_cost_factors
+        draws = [sorted(df['draw'].unique()) for df in [criteria_draws_df, scc_draws_df] if df is not None]
+        if not draws:
+            raise ValueError('No criteria or scc cost factors draws were given')
+        if len(draws) == 2 and draws[0] != draws[1]:
+            raise ValueError('The criteria and scc cost factors draws input files do not have the same draws')
+        self.draws = np.array(draws[0])
+
+        self.criteria_cost_factors = None
+        if criteria_draws_df is not None:
+            self.criteria_cost_factors = CostFactors(criteria_draws_df, 'calendar_year', ['draw'] + emission_cost_factors.criteria_cost_factors.key_cols,
+                                                     emission_cost_factors.criteria_cost_factors.factor_cols, as_of=True)
+        self.scc_cost_factors = None
+        if scc_draws_df is not None:
+            self.scc_cost_factors = CostFactors(scc_draws_df, scc_year_col, ['draw'], emission_cost_factors.scc_cost_factors.factor_cols)
+
+    def lookup_draws(self, cost_factors, years, *keys):
+        """
+
+        Parameters:
+            cost_factors: The CostFactors of a draws input file.\n
+            years: An array of calendar years.\n
+            keys: An array (aligned with years) or a single value of each key column other than the draw.
+
+        Return:
+            An array of (row, factor, draw) of the factors of each row in each draw.
+
+        """
+        years = np.asarray(years, dtype=int)
+        draws = np.repeat(self.draws, len(years))
+        keys = [np.tile(np.asarray(key, dtype=object), len(self.draws)) if np.ndim(key) else key for key in keys]
+        factors = cost_factors.lookup(np.tile(years, len(self.draws)), draws, *keys).to_numpy()
+        return factors.reshape(len(self.draws), len(years), -1).transpose(1, 2, 0)
+
+    def criteria_tensor(self, years, reg_classes, fuels):
+        """
+
+        Parameters:
+            years: An array of calendar years.\n
+            reg_classes: An array of reg classes aligned with years.\n
+            fuels: An array of the fuels of the criteria cost factors aligned with years.
+
+        Return:
+            An array of (row, criteria pollutant, criteria stream, draw) of the criteria cost factors (dollars/ton) of each row in each draw.
+
+        """
+        if self.criteria_cost_factors is None:
+            tensor = self.central.criteria_tensor(years, reg_classes, fuels)
+            return np.broadcast_to(tensor[..., np.newaxis], tensor.shape + (len(self.draws),))
+        return np.stack([self.lookup_draws(self.criteria_cost_factors, years, rate, np.asarray(reg_classes, dtype=object), np.asarray(fuels, dtype=object))
+                         for rate in self.central.criteria_streams.values()], axis=2)
+
+    def scc_tensor(self, years):
+        """
+
+        Parameters:
+            years: An array of calendar years.
+
+        Return:
+            An array of (row, GHG pollutant, scc stream, draw) of the social cost of GHG cost factors (dollars/metric ton) of each row in each draw.
+
+        """
+        if self.scc_cost_factors is None:
+            tensor = self.central.scc_tensor(years)
+            return np.broadcast_to(tensor[..., np.newaxis], tensor.shape + (len(self.draws),))
+        return self.lookup_draws(self.scc_cost_factors, years)[:, self.central.scc_factor_positions, :]
+
+
+if __name__ == '__main__':
+    print('This module does not run as a script.')
@@ -1,8 +1,51 @@
+import numpy as np
+import pandas as pd
 from tool_code.dict_and_df_converters import create_costs_dict, convert_dict_to_df
-from tool_code.benefits_and_costs import calc_social_impacts
+from tool_code.benefits_and_costs import calc_social_impacts, social_impact_args
 
 
-def discount_values(settings, df, id_cols, discount_rates, *non_emission_cost_args):
+def emission_costs_by_discount_rate(settings, args):
+    """
+
+    Parameters:
+        settings: The SetInputs class.\n
+        args: A list of the args of the values being discounted.
+
+    Return:
+        A dictionary of {discount rate: list of emission cost args} of the emission cost args discounted at the rate of each criteria and scc stream
+        (settings.emission_discount_rates). An emission cost arg ends with the label of its stream (e.g., CO2_Costs_3.0_95), which gives its rate;
+        the social impacts of calc_social_impacts, which name a criteria and an scc stream, are not emission costs.
+
+    """
+    stream_rates = settings.emission_cost_factors.stream_discount_rates()
+    social_args = social_impact_args(settings)
+    arg_rates = {arg: rate for label, rate in stream_rates.items() for arg in args if arg.endswith(f'_{label}') and arg not in social_args}
+    return {rate: [arg for arg in args if arg_rates.get(arg) == rate] for rate in settings.emission_discount_rates.values()}
+
+
+def discount_factor(settings, calendar_year, discount_rate):
+    """
+    Note:
+        Values of calendar years before the discount_year of the SetInputs class are not discounted. The calendar year and discount rate may be
+        arrays, in which case the factors are broadcast over them (e.g., over the calendar years and streams of the emission costs of each draw).
+
+    Parameters:
+        settings: The SetInputs class.\n
+        calendar_year: The calendar year of the values.\n
+        discount_rate: The discount rate.
+
+    Return:
+        The factor by which values of the given calendar year are divided to discount them to the discount_year given the costs_start entry of the
+        SetInputs class.
+
+    """
+    if settings.costs_start == 'start-year': discount_offset = 0
+    elif settings.costs_start == 'end-year': discount_offset = 1
+    calendar_year = np.asarray(calendar_year)
+    return np.where(calendar_year >= settings.discount_year, (1 + np.asarray(discount_rate)) ** (calendar_year - settings.discount_year + discount_offset), 1)
+
+
+def discount_values(settings, df, id_cols, discount_rates, *non_emission_cost_args, no_action):
     """
     Note:
         The discount function discounts non-emission args at the social discount rates entered in the SetInputs class and discounts
@@ -10,7 +53,8 @@ def discount_values(settings, df, id_cols, discount_rates, *non_emission_cost_ar
         args are always discounted at their internally consistent discount rate. Values are discounted to a given year and assume costs start at the beginning
         or end of that year.\n
         The passed dictionary keys should consist of:\n
-            (scenario_name, year, reg_class, discount_rate) or (scenario_name, model_year, age, calendar_year, reg_class, discount_rate)\n
+            (scenario_id, year, reg_class, discount_rate) or (scenario_id, model_year, age, calendar_year, reg_class, discount_rate)\n
+        where scenario_id is the Scenario ID of the ScenarioDimension.\n
 
         The costs_start entry of the SetInputs class should be set to 'start-year' or 'end-year', where start-year represents costs
         starting at time t=0 (i.e., first year costs are undiscounted), and end-year represents costs starting at time t=1 (i.e., first year
@@ -21,23 +65,17 @@ def discount_values(settings, df, id_cols, discount_rates, *non_emission_cost_ar
         df: A DataFrame of values to be discounted.\n
         id_cols: The identifying columns to use as keys for the dictionary that is created in function.\n
         discount_rates: The social discount rates to use.\n
-        non_emission_cost_args: Args to be discounted at both social discount rates.
+        non_emission_cost_args: Args to be discounted at both social discount rates.\n
+        no_action: The Scenario ID of the settings.base_social_name scenario.
 
     Return:
         The passed DataFrame with discounted values added; a DataFrame of present values (through the given calendar year); a DataFrame of annualized values (through the given calendar year).
 
     """
-    if settings.costs_start == 'start-year': discount_offset = 0
-    elif settings.costs_start == 'end-year': discount_offset = 1
-    discount_to_year = settings.discount_year
-
     calc_dict = create_costs_dict(df, id_cols)
     for key in calc_dict.keys():
         args = [k for k in calc_dict[key].keys()]
-    emission_costs_3 = [arg for arg in args if 'Cost' in arg and '3.0' in arg]
-    emission_costs_7 = [arg for arg in args if 'Cost' in arg and '7.0' in arg]
-    emission_costs_5 = [arg for arg in args if 'Cost' in arg and '5.0' in arg]
-    emission_costs_25 = [arg for arg in args if 'Cost' in arg and '2.5' in arg]
+    emission_costs_by_rate = emission_costs_by_discount_rate(settings, args)
 
     max_age = 0
     update_dict = dict()
@@ -52,39 +90,14 @@ def discount_values(settings, df, id_cols, discount_rates, *non_emission_cost_ar
         # first discount non-emission costs at each social discount rate while also discounting emission costs at their stream discount rate
         for social_discrate in discount_rates:
             rate_dict = dict()
+            social_discount_factor = float(discount_factor(settings, calendar_year, social_discrate))
             for arg in non_emission_cost_args:
-                if calendar_year >= discount_to_year:
-                    arg_value = calc_dict[key][arg] / ((1 + social_discrate) ** (calendar_year - discount_to_year + discount_offset))
-                else: arg_value = calc_dict[key][arg]
-                rate_dict.update({arg: arg_value})
-
-            emission_discrate = 0.03
-            for arg in emission_costs_3:
-                if calendar_year >= discount_to_year:
-                    arg_value = calc_dict[key][arg] / ((1 + emission_discrate) ** (calendar_year - discount_to_year + discount_offset))
-                else: arg_value = calc_dict[key][arg]
-                rate_dict.update({arg: arg_value})
-
-            emission_discrate = 0.025
-            for arg in emission_costs_25:
-                if calendar_year >= discount_to_year:
-                    arg_value = calc_dict[key][arg] / ((1 + emission_discrate) ** (calendar_year - discount_to_year + discount_offset))
-                else: arg_value = calc_dict[key][arg]
-                rate_dict.update({arg: arg_value})
-
-            emission_discrate = 0.05
-            for arg in emission_costs_5:
-                if calendar_year >= discount_to_year:
-                    arg_value = calc_dict[key][arg] / ((1 + emission_discrate) ** (calendar_year - discount_to_year + discount_offset))
-                else: arg_value = calc_dict[key][arg]
-                rate_dict.update({arg: arg_value})
-
-            emission_discrate = 0.07
-            for arg in emission_costs_7:
-                if calendar_year >= discount_to_year:
-                    arg_value = calc_dict[key][arg] / ((1 + emission_discrate) ** (calendar_year - discount_to_year + discount_offset))
-                else: arg_value = calc_dict[key][arg]
-                rate_dict.update({arg: arg_value})
+                rate_dict.update({arg: calc_dict[key][arg] / social_discount_factor})
+
+            for emission_discrate, emission_costs in emission_costs_by_rate.items():
+                emission_discount_factor = float(discount_factor(settings, calendar_year, emission_discrate))
+                for arg in emission_costs:
+                    rate_dict.update({arg: calc_dict[key][arg] / emission_discount_factor})
 
             if len(id_cols) == 3:
                 update_dict[scenario_name, calendar_year, reg_class, social_discrate] = rate_dict
@@ -92,16 +105,35 @@ def discount_values(settings, df, id_cols, discount_rates, *non_emission_cost_ar
                 update_dict[scenario_name, model_year, age, calendar_year, reg_class, social_discrate] = rate_dict
     calc_dict.update(update_dict)
 
-    calc_dict = calc_social_impacts(settings, calc_dict)
+    calc_dict = calc_social_impacts(settings, calc_dict, no_action)
 
     return_df = convert_dict_to_df(calc_dict, *id_cols, 'Disc-Rate')
+    present_values_df, annualized_df = present_and_annualized_values(settings, calc_dict, id_cols, max_age, *non_emission_cost_args, no_action=no_action)
+
+    return return_df, present_values_df, annualized_df
+
+
+def present_and_annualized_values(settings, calc_dict, id_cols, max_age, *non_emission_cost_args, no_action):
+    """
+
+    Parameters:
+        settings: The SetInputs class.\n
+        calc_dict: A dictionary of the undiscounted and discounted values of discount_values, after calc_social_impacts.\n
+        id_cols: The identifying columns of the keys of the dictionary, without the discount rate.\n
+        max_age: The oldest age with fuel outlay of the model year lifetime values (not used for calendar year values).\n
+        non_emission_cost_args: Args discounted at both social discount rates.\n
+        no_action: The Scenario ID of the settings.base_social_name scenario.
 
+    Return:
+        A DataFrame of present values (through the given calendar year) and a DataFrame of annualized values (through the given calendar year).
+
+    """
     if len(id_cols) == 3:
         present_values_dict = calc_present_values(settings, calc_dict, *non_emission_cost_args)
         annualized_dict = annualize_calendar_year_values(settings, present_values_dict, *non_emission_cost_args)
 
-        present_values_dict = calc_social_impacts(settings, present_values_dict)
-        annualized_dict = calc_social_impacts(settings, annualized_dict)
+        present_values_dict = calc_social_impacts(settings, present_values_dict, no_action)
+        annualized_dict = calc_social_impacts(settings, annualized_dict, no_action)
 
         present_values_df = convert_dict_to_df(present_values_dict, *id_cols, 'Disc-Rate')
         annualized_df = convert_dict_to_df(annualized_dict, *id_cols, 'Disc-Rate')
@@ -110,11 +142,51 @@ def discount_values(settings, df, id_cols, discount_rates, *non_emission_cost_ar
         present_values_dict = calc_present_values(settings, calc_dict, *non_emission_cost_args)
         annualized_dict = annualize_model_year_values(settings, present_values_dict, max_age, *non_emission_cost_args)
 
-        present_values_dict = calc_social_impacts(settings, present_values_dict)
-        annualized_dict = calc_social_impacts(settings, annualized_dict)
+        present_values_dict = calc_social_impacts(settings, present_values_dict, no_action)
+        annualized_dict = calc_social_impacts(settings, annualized_dict, no_action)
 
-        present_values_df = convert_dict_to_df(present_values_dict, 'Scenario Name', 'Model Year', 'Reg-Class', 'Disc-Rate')
-        annualized_df = convert_dict_to_df(annualized_dict, 'Scenario Name', 'Model Year', 'Reg-Class', 'Disc-Rate')
+        present_values_df = convert_dict_to_df(present_values_dict, id_cols[0], 'Model Year', 'Reg-Class', 'Disc-Rate')
+        annualized_df = convert_dict_to_df(annualized_dict, id_cols[0], 'Model Year', 'Reg-Class', 'Disc-Rate')
+
+    return present_values_df, annualized_df
+
+
+def sum_to_calendar_years(settings, df, id_cols, *non_emission_cost_args, no_action):
+    """
+    Note:
+        Values are discounted by the discount factor of their calendar year and the social impacts are differences from the base_social_name
+        scenario of the same key, so the discounted values and social impacts of a calendar year are the sums of those of the model years on the road
+        in that year. Only the present values and annualized values, which are cumulative over calendar years, are calculated from the sums.
+
+    Parameters:
+        settings: The SetInputs class.\n
+        df: A DataFrame of the discounted model year lifetime values of discount_values holding every model year on the road in each calendar year.\n
+        id_cols: The identifying columns of the calendar year values (scenario_id, calendar_year, reg_class).\n
+        non_emission_cost_args: Args discounted at both social discount rates.\n
+        no_action: The Scenario ID of the settings.base_social_name scenario.
+
+    Return:
+        The discounted values, a DataFrame of present values and a DataFrame of annualized values of the calendar years, as returned by discount_values
+        for calendar year values. Rows are in the order of discount_values: the undiscounted values by scenario, with the reg class TOTAL rows of
+        every scenario after the others, then the discounted values of each of those rows.
+
+    """
+    df = df.drop(columns=['Model Year', 'Age']).groupby(by=id_cols + ['Disc-Rate'], as_index=False, sort=False).sum()
+    order = df[id_cols + ['Disc-Rate']].assign(discounted=df['Disc-Rate'] != 0, total=df[id_cols[2]] == 'TOTAL', scenario=pd.factorize(df[id_cols[0]])[0])
+    df = df.loc[order.sort_values(by=['discounted', 'total', 'scenario', id_cols[1], id_cols[2], 'Disc-Rate'], kind='mergesort').index, :].reset_index(drop=True)
+
+    calc_dict = create_costs_dict(df, id_cols)
+    return_df = convert_dict_to_df(calc_dict, *id_cols, 'Disc-Rate')
+
+    # the discounted values of discount_values hold the non-emission costs first and then the emission costs by discount rate, which sets the
+    # column order of the present and annualized values
+    args = [arg for arg in df.columns if arg not in id_cols + ['Disc-Rate']]
+    emission_costs = [arg for emission_costs in emission_costs_by_discount_rate(settings, args).values() for arg in emission_costs]
+    discounted_args = list(dict.fromkeys(list(non_emission_cost_args) + emission_costs + args))
+    for key in calc_dict.keys():
+        if key[-1] != 0:
+            calc_dict[key] = {arg: calc_dict[key][arg] for arg in discounted_args}
+    present_values_df, annualized_df = present_and_annualized_values(settings, calc_dict, id_cols, 0, *non_emission_cost_args, no_action=no_action)
 
     return return_df, present_values_df, annualized_df
 
@@ -221,10 +293,7 @@ def annualize_calendar_year_values(settings, dict_of_values, *non_emission_cost_
 
     for key in dict_of_values.keys():
         args = [k for k in dict_of_values[key].keys()]
-    emission_costs_3 = [arg for arg in args if 'Cost' in arg and '3.0' in arg]
-    emission_costs_7 = [arg for arg in args if 'Cost' in arg and '7.0' in arg]
-    emission_costs_5 = [arg for arg in args if 'Cost' in arg and '5.0' in arg]
-    emission_costs_25 = [arg for arg in args if 'Cost' in arg and '2.5' in arg]
+    emission_costs_by_rate = emission_costs_by_discount_rate(settings, args)
 
     # now annualize those present values, but skip for keys having discount_rate == 0
     annualized_dict = dict()
@@ -241,33 +310,12 @@ def annualize_calendar_year_values(settings, dict_of_values, *non_emission_cost_
                                  / ((1 + discount_rate) ** (periods + annualized_offset) - 1)
                 key_dict.update({arg: annualized_arg})
 
-            emission_discrate = 0.03
-            for arg in emission_costs_3:
-                present_value = dict_of_values[key][arg]
-                annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
-                                 / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
-                key_dict.update({arg: annualized_arg})
-
-            emission_discrate = 0.025
-            for arg in emission_costs_25:
-                present_value = dict_of_values[key][arg]
-                annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
-                                 / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
-                key_dict.update({arg: annualized_arg})
-
-            emission_discrate = 0.05
-            for arg in emission_costs_5:
-                present_value = dict_of_values[key][arg]
-                annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
-                                 / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
-                key_dict.update({arg: annualized_arg})
-
-            emission_discrate = 0.07
-            for arg in emission_costs_7:
-                present_value = dict_of_values[key][arg]
-                annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
-                                 / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
-                key_dict.update({arg: annualized_arg})
+            for emission_discrate, emission_costs in emission_costs_by_rate.items():
+                for arg in emission_costs:
+                    present_value = dict_of_values[key][arg]
+                    annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
+                                     / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
+                    key_dict.update({arg: annualized_arg})
             annualized_dict[key] = key_dict
 
     return annualized_dict
@@ -311,10 +359,7 @@ def annualize_model_year_values(settings, dict_of_values, max_age, *non_emission
 
     for key in dict_of_values.keys():
         args = [k for k in dict_of_values[key].keys()]
-    emission_costs_3 = [arg for arg in args if 'Cost' in arg and '3.0' in arg]
-    emission_costs_7 = [arg for arg in args if 'Cost' in arg and '7.0' in arg]
-    emission_costs_5 = [arg for arg in args if 'Cost' in arg and '5.0' in arg]
-    emission_costs_25 = [arg for arg in args if 'Cost' in arg and '2.5' in arg]
+    emission_costs_by_rate = emission_costs_by_discount_rate(settings, args)
 
     # now annualize those present values, but skip for keys having discount_rate == 0
     annualized_dict = dict()
@@ -331,33 +376,12 @@ def annualize_model_year_values(settings, dict_of_values, max_age, *non_emission
                                  / ((1 + discount_rate) ** (periods + annualized_offset) - 1)
                 key_dict.update({arg: annualized_arg})
 
-            emission_discrate = 0.03
-            for arg in emission_costs_3:
-                present_value = dict_of_values[key][arg]
-                annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
-                                 / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
-                key_dict.update({arg: annualized_arg})
-
-            emission_discrate = 0.025
-            for arg in emission_costs_25:
-                present_value = dict_of_values[key][arg]
-                annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
-                                 / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
-                key_dict.update({arg: annualized_arg})
-
-            emission_discrate = 0.05
-            for arg in emission_costs_5:
-                present_value = dict_of_values[key][arg]
-                annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
-                                 / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
-                key_dict.update({arg: annualized_arg})
-
-            emission_discrate = 0.07
-            for arg in emission_costs_7:
-                present_value = dict_of_values[key][arg]
-                annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
-                                 / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
-                key_dict.update({arg: annualized_arg})
+            for emission_discrate, emission_costs in emission_costs_by_rate.items():
+                for arg in emission_costs:
+                    present_value = dict_of_values[key][arg]
+                    annualized_arg = present_value * emission_discrate * (1 + emission_discrate) ** periods \
+                                     / ((1 + emission_discrate) ** (periods + annualized_offset) - 1)
+                    key_dict.update({arg: annualized_arg})
             annualized_dict[key] = key_dict
 
     return annualized_dict
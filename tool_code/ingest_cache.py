@@ -0,0 +1,151 @@
+import hashlib
+import os
+from pathlib import Path
+import pandas as pd
+import tool_code
+
+
+class IngestCache:
+    """
+
+    The IngestCache class stores the scrubbed DataFrame of each CCEMS report file read by the tool in Feather format so that later tool runs that use the
+    same report files can skip CSV parsing entirely.
+
+    Note:
+        Entries are content addressed. The path, size and modification time of a report file are used to look up the hash of its contents (the hash
+        is recalculated only when one of those changes) and the entry name is built from that content hash along with anything else that changes
+        the scrubbed DataFrame (e.g., the base_scenario_name) and the code version (see code_version), so that entries written by other versions of
+        the reading and scrubbing code are never used. The least recently used entries and stat key files are deleted once the cache grows beyond
+        max_megabytes.
+
+    """
+
+    def __init__(self, path_cache, max_megabytes):
+        self.path_cache = Path(path_cache)
+        self.path_cache.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_megabytes * 1e6
+        # the reading and scrubbing code, the row filters and column projections of the report classes and the report schemas of the settings
+        code_files = ['combinator_functions.py', 'report_classes.py', 'postproc_setup.py', Path(__file__).name]
+        self.code_version = self.code_version_of(*[Path(__file__).parent / code_file for code_file in code_files])
+
+    @staticmethod
+    def code_version_of(*code_files):
+        """
+
+        Parameters:
+            code_files: Paths to the source files of the code that reads and scrubs the report files.
+
+        Return:
+            The SHA-256 hash of the tool version and the contents of the given source files.
+
+        """
+        code_hash = hashlib.sha256(tool_code.__version__.encode())
+        for code_file in code_files:
+            code_hash.update(Path(code_file).read_bytes())
+        return code_hash.hexdigest()
+
+    def content_hash(self, file):
+        """
+
+        Parameters:
+            file: Path to the report file.
+
+        Return:
+            The SHA-256 hash of the file contents, taken from the stat key of the file if it has been hashed before.
+
+        """
+        stat = file.stat()
+        stat_key = hashlib.sha256(f'{file.resolve()}|{stat.st_size}|{stat.st_mtime_ns}'.encode()).hexdigest()
+        path_stat_key = self.path_cache / f'{stat_key}.hash'
+        if path_stat_key.exists():
+            try:
+                content_hash = path_stat_key.read_text()
+                os.utime(path_stat_key)
+                return content_hash
+            except FileNotFoundError:
+                pass
+
+        file_hash = hashlib.sha256()
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                file_hash.update(block)
+        content_hash = file_hash.hexdigest()
+        self.write_atomic(path_stat_key, lambda path: path.write_text(content_hash))
+        return content_hash
+
+    def entry_path(self, file, *variant):
+        """
+
+        Parameters:
+            file: Path to the report file.\n
+            variant: Any values, other than the file contents, that change the DataFrame stored for the file.
+
+        Return:
+            The path of the cache entry for the given file and variant.
+
+        """
+        entry_key = hashlib.sha256('|'.join([self.content_hash(file), self.code_version] + [str(item) for item in variant]).encode()).hexdigest()
+        return self.path_cache / f'{entry_key}.feather'
+
+    def load(self, entry):
+        """
+
+        Parameters:
+            entry: The path of the cache entry.
+
+        Return:
+            The cached DataFrame, or None if the entry does not exist.
+
+        """
+        try:
+            df = pd.read_feather(entry)
+        except FileNotFoundError:
+            return None
+        # touch the entry so that eviction removes the least recently used entries first
+        os.utime(entry)
+        return df
+
+    def store(self, entry, df):
+        """
+
+        Parameters:
+            entry: The path of the cache entry.\n
+            df: The DataFrame to store.
+
+        Return:
+            Nothing, but the DataFrame is saved and the least recently used entries are evicted if the cache has grown beyond its maximum size.
+
+        """
+        self.write_atomic(entry, lambda path: df.reset_index(drop=True).to_feather(path))
+        self.evict()
+
+    def evict(self):
+        # stat key files are evicted along with the entries; an evicted stat key only means the file is hashed again when next read
+        entries = list()
+        for path in list(self.path_cache.glob('*.feather')) + list(self.path_cache.glob('*.hash')):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        cache_bytes = sum([size for mtime, size, path in entries])
+        for mtime, size, path in sorted(entries):
+            if cache_bytes <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            cache_bytes -= size
+
+    @staticmethod
+    def write_atomic(path, write):
+        # write to a temporary file first so that other processes never read a partially written entry
+        path_tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        write(path_tmp)
+        os.replace(path_tmp, path)
+
+
+if __name__ == '__main__':
+    print('This module does not run as a script.')
@@ -41,6 +41,7 @@ def calc_new_tech_costs_in_cost_summary_report(input_df, compliance_report):
     Note:
         This function adds off-cycle costs to the cost summary report results since off-cycle costs are not part of EPA's CCEMS runs.
         The Reg-Cost of the combined compliance report should already have been recalculated relative to the CCEMS value by removing any fines and including off-cycle costs.
+        Both DataFrames identify scenarios by the Scenario ID of the ScenarioDimension.
 
     Parameters:
         input_df: A DataFrame reflecting the combined cost summary reports for the given tool run.
@@ -52,13 +53,13 @@ def calc_new_tech_costs_in_cost_summary_report(input_df, compliance_report):
     """
     calc_df = input_df.copy()
     new_tech_costs = compliance_report.loc[compliance_report['Manufacturer'] == 'TOTAL',
-                                           ['Scenario Name', 'Model Year', 'Reg-Class', 'Reg-Cost']]
+                                           ['Scenario ID', 'Model Year', 'Reg-Class', 'Reg-Cost']]
     # convert to thousands for cost summary report
     new_tech_costs['Reg-Cost'] = new_tech_costs['Reg-Cost'] / 1000
     new_tech_costs.rename(columns={'Model Year': 'Calendar Year'}, inplace=True)
 
     calc_df.drop(columns='Tech Cost', inplace=True)
-    calc_df = calc_df.merge(new_tech_costs, on=['Scenario Name', 'Calendar Year', 'Reg-Class'], how='left')
+    calc_df = calc_df.merge(new_tech_costs, on=['Scenario ID', 'Calendar Year', 'Reg-Class'], how='left')
     calc_df.rename(columns={'Reg-Cost': 'Tech Cost'}, inplace=True)
 
     return calc_df
@@ -69,6 +70,7 @@ def calc_new_tech_costs_in_cost_report(input_df, compliance_report):
     Note:
         This function adds off-cycle costs to the cost report results since off-cycle costs are not part of EPA's CCEMS runs.
         The Reg-Cost of the combined compliance report should already been been recalculated relative to the CCEMS value by removing any fines and including off-cycle costs.
+        Both DataFrames identify scenarios by the Scenario ID of the ScenarioDimension.
 
     Parameters:
         input_df: A DataFrame reflecting the combined cost reports for the given tool run.
@@ -80,7 +82,7 @@ def calc_new_tech_costs_in_cost_report(input_df, compliance_report):
     """
     calc_df = input_df.copy()
     new_tech_costs = compliance_report.loc[compliance_report['Manufacturer'] == 'TOTAL',
-                                           ['Scenario Name', 'Model Year', 'Reg-Class', 'Reg-Cost']]
+                                           ['Scenario ID', 'Model Year', 'Reg-Class', 'Reg-Cost']]
     # convert to thousands for cost summary report
     new_tech_costs['Reg-Cost'] = new_tech_costs['Reg-Cost'] / 1000
 
@@ -88,7 +90,7 @@ def calc_new_tech_costs_in_cost_report(input_df, compliance_report):
     new_tech_costs.insert(0, 'Age', 0)
 
     calc_df.drop(columns='Tech Cost', inplace=True)
-    calc_df = calc_df.merge(new_tech_costs, on=['Scenario Name', 'Model Year', 'Age', 'Reg-Class'], how='left')
+    calc_df = calc_df.merge(new_tech_costs, on=['Scenario ID', 'Model Year', 'Age', 'Reg-Class'], how='left')
     calc_df.rename(columns={'Reg-Cost': 'Tech Cost'}, inplace=True)
 
     # now fill NaN with 0 since the merge above leaves NaN entries for Tech Cost where Age is > 0
@@ -1,5 +1,6 @@
 from pathlib import Path
 import pandas as pd
+from tool_code.cost_factors import CostFactors, EmissionCostFactors, EmissionCostFactorDraws
 
 
 class SetPaths:
@@ -73,7 +74,10 @@ class RuntimeSettings:
 
     def __init__(self):
         set_paths = SetPaths()
-        self.runtime_dict = pd.read_csv(set_paths.path_inputs / 'runtime_settings.csv', index_col=0).to_dict('index')
+        runtime_df = pd.read_csv(set_paths.path_inputs / 'runtime_settings.csv', index_col=0)
+        # a scenario_names entry makes pandas read all values as text, so numbers are converted back for the comparisons below
+        runtime_df['value'] = [self.numeric_or_text(value) for value in runtime_df['value']]
+        self.runtime_dict = runtime_df.to_dict('index')
         self.run_compliance_report = True if self.runtime_dict['run_compliance_report']['value'] == 1 else False
         self.run_effects_summary_report = True if self.runtime_dict['run_effects_summary_report']['value'] == 1 else False
         self.run_costs_summary_report = True if self.runtime_dict['run_costs_summary_report']['value'] == 1 else False
@@ -83,6 +87,73 @@ class RuntimeSettings:
         self.run_vehicles_report = True if self.runtime_dict['run_vehicles_report']['value'] == 1 else False
         self.run_copy_paster = True if self.runtime_dict['run_copy_paster']['value'] == 1 else False
 
+        # optional settings; defaults apply when they are not included in runtime_settings.csv
+        self.ingest_workers = int(self.runtime_dict['ingest_workers']['value']) if 'ingest_workers' in self.runtime_dict else 1
+        self.ingest_cache = True if 'ingest_cache' in self.runtime_dict and self.runtime_dict['ingest_cache']['value'] == 1 else False
+        self.ingest_cache_max_mb = float(self.runtime_dict['ingest_cache_max_mb']['value']) if 'ingest_cache_max_mb' in self.runtime_dict else 2000
+        self.ingest_chunksize = int(self.runtime_dict['ingest_chunksize']['value']) if 'ingest_chunksize' in self.runtime_dict else 0
+        self.prefetch_reports = True if 'prefetch_reports' in self.runtime_dict and self.runtime_dict['prefetch_reports']['value'] == 1 else False
+        self.report_workers = int(self.runtime_dict['report_workers']['value']) if 'report_workers' in self.runtime_dict else 1
+        self.derive_summary_reports = True if 'derive_summary_reports' in self.runtime_dict and self.runtime_dict['derive_summary_reports']['value'] == 1 else False
+        self.run_uncertainty_report = True if 'run_uncertainty_report' in self.runtime_dict and self.runtime_dict['run_uncertainty_report']['value'] == 1 else False
+
+        # optional subsets of scenarios (separated by semicolons) and years for quick partial runs
+        self.scenario_names = None
+        if 'scenario_names' in self.runtime_dict and pd.notna(self.runtime_dict['scenario_names']['value']):
+            self.scenario_names = [name.strip() for name in str(self.runtime_dict['scenario_names']['value']).split(';')]
+        self.start_year = int(self.runtime_dict['start_year']['value']) \
+            if 'start_year' in self.runtime_dict and pd.notna(self.runtime_dict['start_year']['value']) else None
+        self.end_year = int(self.runtime_dict['end_year']['value']) \
+            if 'end_year' in self.runtime_dict and pd.notna(self.runtime_dict['end_year']['value']) else None
+
+    @staticmethod
+    def numeric_or_text(value):
+        """
+
+        Parameters:
+            value: A value of the runtime_settings.csv file.
+
+        Return:
+            The value as a number if it is numeric, otherwise the value as passed.
+
+        """
+        try:
+            return pd.to_numeric(value)
+        except (ValueError, TypeError):
+            return value
+
+    def year_range(self, first=None, last=None):
+        """
+
+        Parameters:
+            first: The first year needed by a report, or None if there is no first year.\n
+            last: The last year needed by a report, or None if there is no last year.
+
+        Return:
+            A (first, last) tuple of the passed years narrowed to the start_year and end_year runtime settings, if set.
+
+        """
+        if self.start_year is not None:
+            first = self.start_year if first is None else max(first, self.start_year)
+        if self.end_year is not None:
+            last = self.end_year if last is None else min(last, self.end_year)
+        return first, last
+
+    def scenario_subset(self, settings):
+        """
+
+        Parameters:
+            settings: The SetInputs class.
+
+        Return:
+            A list of the scenario_names runtime setting along with the base_social_name, which every benefit-cost calculation needs, or None if
+            scenario_names is not set.
+
+        """
+        if self.scenario_names is None:
+            return None
+        return sorted(set(self.scenario_names) | {settings.base_social_name})
+
 
 class SetInputs:
     """
@@ -111,6 +182,29 @@ class SetInputs:
 
         self.off_cycle_cost_per_credit = float(self.general_inputs['off_cycle_cost_per_credit']['value'])
 
+        # the ingest cache folder is optional in general_inputs.csv; relative paths are relative to the tool folder
+        if 'ingest_cache_folder' in self.general_inputs:
+            self.path_ingest_cache = set_paths.path_tool / self.general_inputs['ingest_cache_folder']['value']
+        else:
+            self.path_ingest_cache = set_paths.path_tool_runs / 'ingest_cache'
+
+        # the scenario pairs file is optional in general_inputs.csv; without it every FWO scenario is paired with every NFWO scenario of a model run
+        # the file is checked by the preflight check, so a file without the expected columns gives no pairs here rather than an error
+        self.scenario_pairs_cols = ['run', 'FWO_scenario', 'NFWO_scenario']
+        if 'scenario_pairs_filename' in self.general_inputs:
+            self.scenario_pairs_filename = self.general_inputs['scenario_pairs_filename']['value']
+            self.scenario_pairs_df = pd.read_csv(set_paths.path_inputs / self.scenario_pairs_filename)
+            self.scenario_pairs = dict()
+            for k in self.run_folders.keys():
+                if all([col in self.scenario_pairs_df.columns for col in self.scenario_pairs_cols]):
+                    pairs = self.scenario_pairs_df.loc[self.scenario_pairs_df['run'] == k, :]
+                    self.scenario_pairs[k] = [(fwo, nfwo) for fwo, nfwo in zip(pairs['FWO_scenario'], pairs['NFWO_scenario'])]
+                else:
+                    self.scenario_pairs[k] = list()
+        else:
+            self.scenario_pairs_filename, self.scenario_pairs_df = None, None
+            self.scenario_pairs = None
+
         self.model_runs = dict()
         for k in self.run_folders.keys():
             self.model_runs.update({k: [self.run_folders[k]['FWO_folder'], self.run_folders[k]['NFWO_folder'], self.run_folders[k]['YearShift']]})
@@ -138,6 +232,17 @@ class SetInputs:
         self.tech_pens_report_name = 'technology_utilization_report'
         self.vehicles_report_name = 'vehicles_report'
 
+        # dtype schemas for reading each report; dimensions are read as categoricals and integer measures are downcast to the narrowest integer dtype
+        # float measures are kept as float64 since float32 is not lossless for the sums and weighted averages calculated by this tool
+        self.report_schemas = {self.compliance_report_name: {'dimensions': ['Scenario Name', 'Manufacturer', 'Reg-Class']},
+                               self.costs_summary_report_name: {'dimensions': ['Scenario Name', 'Reg-Class']},
+                               self.costs_report_name: {'dimensions': ['Scenario Name', 'Reg-Class']},
+                               self.effects_summary_report_name: {'dimensions': ['Scenario Name', 'Reg-Class', 'Fuel Type']},
+                               self.effects_report_name: {'dimensions': ['Scenario Name', 'Reg-Class', 'Fuel Type']},
+                               self.tech_pens_report_name: {'dimensions': ['Scenario Name', 'Manufacturer', 'Reg-Class', 'Param Type']},
+                               self.vehicles_report_name: {'dimensions': ['Scenario Name', 'Manufacturer', 'Powertrain', 'Tech Class', 'TechKey']},
+                               }
+
         # lists for calcs in the compliance report
         self.args_to_sum = ['Sales', 'Jobs',
                             'AC Efficiency Cost', 'AC Leakage Cost', 'Off-Cycle Cost', 'Tech Cost', 'Reg-Cost',
@@ -175,28 +280,40 @@ class SetInputs:
         self.fatality_risk_value = 'Fatality Risk Value'
         self.non_fatal_crash_risk_value = 'Non-Fatal Crash Risk Value'
         self.petrol_market_externalities = 'Petroleum Market Externalities'
-        self.social_criteria_benefit_args = ['Criteria_Costs_3.0', 'Criteria_Costs_7.0']
-        self.social_scc_benefit_args = ['GHG_Costs_5.0', 'GHG_Costs_3.0', 'GHG_Costs_2.5', 'GHG_Costs_3.0_95']
-
-        # read criteria and scc cost factors
-        self.df = pd.read_csv(set_paths.path_inputs / self.general_inputs['criteria_cost_factors_filename']['value'])
-        self.key = pd.Series(zip(self.df['calendar_year'], zip(self.df['discount_rate'], self.df['reg_class'], self.df['fuel'])))
-        self.df.insert(0, 'id', self.key)
-        self.df.set_index('id', inplace=True)
-        self.criteria_cost_factors = self.df.to_dict('index')
-
-        self.scc_cost_factors = pd.read_csv(set_paths.path_inputs / self.general_inputs['scc_cost_factors_filename']['value'], index_col=0).to_dict('index')
 
-        self.energy_security_cost_factors \
-            = pd.read_excel(set_paths.path_inputs / self.general_inputs['energy_security_cost_factors_filename']['value'],
-                            sheet_name='Average Premiums', index_col=0, skiprows=1, engine='openpyxl').to_dict('index')
+        # read the criteria, scc and energy security cost factors and compile them into year-indexed arrays shared by the cost calculations
+        # the criteria cost factors are as-of the latest year on or before each calendar year; energy security premia are clamped to the last year
+        # the criteria and scc pollutants and valuation streams are those of the input files
+        criteria_df = pd.read_csv(set_paths.path_inputs / self.general_inputs['criteria_cost_factors_filename']['value'])
+        scc_df = pd.read_csv(set_paths.path_inputs / self.general_inputs['scc_cost_factors_filename']['value'], index_col=0)
+        self.emission_cost_factors = EmissionCostFactors(criteria_df, scc_df.reset_index(), scc_df.index.name)
+        self.social_criteria_benefit_args = [f'Criteria_Costs_{stream}' for stream in self.emission_cost_factors.criteria_streams]
+        self.social_scc_benefit_args = [f'GHG_Costs_{stream}' for stream in self.emission_cost_factors.scc_streams]
+
+        # the criteria and scc cost factors draws of the uncertainty report are optional in general_inputs.csv
+        criteria_draws_df, scc_draws_df, scc_draws_year_col = None, None, None
+        if 'criteria_cost_factors_draws_filename' in self.general_inputs:
+            criteria_draws_df = pd.read_csv(set_paths.path_inputs / self.general_inputs['criteria_cost_factors_draws_filename']['value'])
+        if 'scc_cost_factors_draws_filename' in self.general_inputs:
+            scc_draws_df = pd.read_csv(set_paths.path_inputs / self.general_inputs['scc_cost_factors_draws_filename']['value'])
+            scc_draws_year_col = scc_df.index.name
+        if criteria_draws_df is not None or scc_draws_df is not None:
+            self.emission_cost_factor_draws = EmissionCostFactorDraws(self.emission_cost_factors, criteria_draws_df, scc_draws_df, scc_draws_year_col)
+        else:
+            self.emission_cost_factor_draws = None
+        self.uncertainty_percentiles = [5, 25, 50, 75, 95]
+
+        df = pd.read_excel(set_paths.path_inputs / self.general_inputs['energy_security_cost_factors_filename']['value'],
+                           sheet_name='Average Premiums', index_col=0, skiprows=1, engine='openpyxl')
+        # rows without a year (e.g., notes below the table) are dropped and only the premium is a factor (e.g., not a text Source column)
+        df = df.loc[df.index.notna(), :]
+        self.energy_security_cost_factors = CostFactors(df.reset_index(), df.index.name, factor_cols=['2018 $ / barrel'], clamp_to_last_year=True)
 
         # for discounting
         self.costs_start = self.general_inputs['costs_start']['value']
         self.discount_year = int(self.general_inputs['discount_year']['value'])
         self.social_discount_rates = [0.03, 0.07]
-        self.criteria_discount_rates = [0.03, 0.07]
-        self.scc_discount_rates = [0.025, 0.03, 0.05]
+        self.emission_discount_rates = self.emission_cost_factors.discount_rates()
 
         # set values used in-code
         self.vmt_car = float(self.general_inputs['vmt_car']['value'])
@@ -0,0 +1,246 @@
+from itertools import product
+import pandas as pd
+from tool_code.combinator_functions import find_report_file, open_report, pairing_name
+from tool_code.report_classes import VehiclesReport
+
+
+class PreflightError(Exception):
+    """
+
+    The PreflightError is raised by the preflight check with the complete list of problems found in the model run folders.
+
+    """
+    pass
+
+
+def reports_to_check(settings, runtime_settings):
+    """
+
+    Parameters:
+        settings: The SetInputs class.\n
+        runtime_settings: The RuntimeSettings class.
+
+    Return:
+        A list of the names of the CCEMS reports read by the requested reports, including those read only to build other reports (e.g., the compliance
+        report is needed by the tech utilization and costs reports).
+
+    """
+    # the uncertainty report is built on the costs summary report
+    costs_summary = runtime_settings.run_costs_summary_report or runtime_settings.run_uncertainty_report
+    report_flags = {settings.compliance_report_name: runtime_settings.run_compliance_report or runtime_settings.run_tech_utilization_report
+                    or costs_summary or runtime_settings.run_costs_report,
+                    settings.effects_summary_report_name: runtime_settings.run_effects_summary_report or costs_summary,
+                    settings.effects_report_name: runtime_settings.run_effects_report or runtime_settings.run_costs_report,
+                    settings.costs_summary_report_name: costs_summary,
+                    settings.costs_report_name: runtime_settings.run_costs_report,
+                    settings.tech_pens_report_name: runtime_settings.run_tech_utilization_report,
+                    settings.vehicles_report_name: runtime_settings.run_vehicles_report,
+                    }
+    return [report_name for report_name, flag in report_flags.items() if flag]
+
+
+def required_columns(settings, report_name):
+    """
+
+    Parameters:
+        settings: The SetInputs class.\n
+        report_name: The name of the CCEMS report.
+
+    Return:
+        A list of the columns of the given report that the report classes and the emission, energy security and benefit-cost calculations need.
+
+    """
+    inventory = ['PM Tailpipe (t)', 'PM Upstream (t)', 'NOx Tailpipe (t)', 'NOx Upstream (t)', 'SO2 Tailpipe (t)', 'SO2 Upstream (t)',
+                 'CO2 Total (mmt)', 'CH4 Total (t)', 'N2O Total (t)']
+    effects = ['kVMT', 'Fatalities', 'Fatalities From Rebound', 'kGallons'] + inventory
+    costs = ['Disc-Rate', settings.retail_fuel_expenditures, settings.fuel_tax_revenues] \
+            + settings.social_cost_args + settings.consumer_surplus_as_cost_args \
+            + [settings.fatality_costs, settings.fatality_risk_value, settings.non_fatal_crash_costs, settings.non_fatal_crash_risk_value,
+               settings.drive_value, settings.refueling_time_cost, settings.petrol_market_externalities]
+    columns = {settings.compliance_report_name: ['Model Year', 'Manufacturer', 'Reg-Class', 'Sales', 'CAFE (2-cycle)', 'CO-2 Rating', 'AC Efficiency',
+                                                 'AC Leakage', 'Off-Cycle Credits', 'Avg AC Efficiency Cost', 'Avg AC Leakage Cost', 'Avg Tech Cost'],
+               settings.effects_summary_report_name: ['Calendar Year', 'Reg-Class', 'Fuel Type', 'Fleet', 'Average Age'] + effects,
+               settings.effects_report_name: ['Model Year', 'Age', 'Calendar Year', 'Reg-Class', 'Fuel Type'] + effects,
+               settings.costs_summary_report_name: ['Calendar Year', 'Reg-Class'] + costs,
+               settings.costs_report_name: ['Model Year', 'Age', 'Calendar Year', 'Reg-Class'] + costs,
+               settings.tech_pens_report_name: ['Model Year', 'Manufacturer', 'Reg-Class', 'Param Type'],
+               settings.vehicles_report_name: VehiclesReport.cols,
+               }
+    return ['Scenario', 'Scenario Name'] + [col for col in columns[report_name] if col not in ['Scenario', 'Scenario Name']]
+
+
+def check_report_file(settings, run_path, report_name):
+    """
+
+    Parameters:
+        settings: The SetInputs class.\n
+        run_path: The path to the reports-csv folder of a Framework or NonFramework OEM model run.\n
+        report_name: The name of the CCEMS report.
+
+    Return:
+        A list of problems with the given report file, found by reading only its header and first row.
+
+    """
+    file = find_report_file(run_path, report_name)
+    if not file.exists():
+        return [f'{run_path}: {report_name} not found']
+
+    try:
+        with open_report(file) as source:
+            df = pd.read_csv(source, nrows=1)
+    except Exception as e:
+        return [f'{file}: could not be read ({e})']
+
+    problems = list()
+    missing_cols = [col for col in required_columns(settings, report_name) if col not in df.columns]
+    if missing_cols:
+        problems.append(f'{file}: missing columns {missing_cols}')
+    if 'Scenario Name' in df.columns and (len(df) == 0 or df['Scenario Name'][0] != settings.base_scenario_name):
+        scenario_name = df['Scenario Name'][0] if len(df) else None
+        problems.append(f'{file}: scenario 0 is "{scenario_name}" but should be the base_scenario_name "{settings.base_scenario_name}"')
+    return problems
+
+
+def scenario_names_of(settings, run_path, report_name):
+    """
+
+    Parameters:
+        settings: The SetInputs class.\n
+        run_path: The path to the reports-csv folder of a Framework or NonFramework OEM model run.\n
+        report_name: The name of the CCEMS report.
+
+    Return:
+        A list of the scenario names of the given report file other than the base_scenario_name, reading only its Scenario Name column.
+
+    """
+    with open_report(find_report_file(run_path, report_name)) as source:
+        scenario_names = pd.read_csv(source, usecols=['Scenario Name'], dtype='category')['Scenario Name'].unique()
+    return [name for name in scenario_names if name != settings.base_scenario_name]
+
+
+def check_scenario_pairs(settings, model_run, framework_oem_scenario_names, nonframework_oem_scenario_names):
+    """
+
+    Parameters:
+        settings: The SetInputs class.\n
+        model_run: The model_runs_path_dict key of the model run.\n
+        framework_oem_scenario_names: A list of the scenario names of the Framework OEM reports of the model run.\n
+        nonframework_oem_scenario_names: A list of the scenario names of the NonFramework OEM reports of the model run.
+
+    Return:
+        A list of problems with the scenario pairs of the given model run (a pair naming a scenario not in the reports); and a list of the
+        (scenario_name, framework_oem_scenario_name, nonframework_oem_scenario_name) of each combined scenario the model run builds, in the order in
+        which they are built.
+
+    """
+    if settings.scenario_pairs is None:
+        scenario_pairs = product(framework_oem_scenario_names, nonframework_oem_scenario_names)
+    else:
+        scenario_pairs = settings.scenario_pairs.get(model_run, list())
+
+    problems, pairings = list(), list()
+    for framework_oem_scenario_name, nonframework_oem_scenario_name in scenario_pairs:
+        if framework_oem_scenario_name not in framework_oem_scenario_names or nonframework_oem_scenario_name not in nonframework_oem_scenario_names:
+            problems.append(f'{settings.scenario_pairs_filename}: scenario pair "{framework_oem_scenario_name}", "{nonframework_oem_scenario_name}" '
+                            f'of run {model_run} is not in the reports')
+            continue
+        pairings.append((pairing_name(framework_oem_scenario_name, nonframework_oem_scenario_name), framework_oem_scenario_name,
+                         nonframework_oem_scenario_name))
+    return problems, pairings
+
+
+def check_scenario_pairs_file(settings):
+    """
+
+    Parameters:
+        settings: The SetInputs class.
+
+    Return:
+        A list of problems with the columns and runs of the scenario pairs file, if one is named in the general_inputs.csv file.
+
+    """
+    if settings.scenario_pairs_df is None:
+        return list()
+    missing_cols = [col for col in settings.scenario_pairs_cols if col not in settings.scenario_pairs_df.columns]
+    if missing_cols:
+        return [f'{settings.scenario_pairs_filename}: missing columns {missing_cols}']
+    unknown_runs = [run for run in settings.scenario_pairs_df['run'].unique() if run not in settings.model_runs]
+    if unknown_runs:
+        return [f'{settings.scenario_pairs_filename}: runs {unknown_runs} are not in the run_folders file']
+    return list()
+
+
+def preflight(settings, runtime_settings):
+    """
+    Note:
+        This function checks every report file needed by the requested reports in every model run folder before any real work starts, reading only the
+        header and first row of each, so that a missing file, missing column or wrong scenario 0 is found in seconds rather than after processing
+        earlier reports. The scenario pairs are checked against the Scenario Name column of the first report of each model run folder, and the
+        base_social_name and each of the scenario_names runtime setting must be one of the combined scenarios built.
+
+    Parameters:
+        settings: The SetInputs class.\n
+        runtime_settings: The RuntimeSettings class.
+
+    Return:
+        A list of the (scenario_name, framework_oem_scenario_name, nonframework_oem_scenario_name, model_run) of each combined scenario to be built, in
+        model run and pair order, so that Scenario IDs can be given before any report is read; a PreflightError listing every problem found is
+        raised if there are any.
+
+    """
+    report_names = reports_to_check(settings, runtime_settings)
+    problems = list()
+    if runtime_settings.start_year is not None and runtime_settings.start_year > settings.discount_year:
+        problems.append(f'runtime_settings.csv: start_year {runtime_settings.start_year} is later than the discount_year {settings.discount_year} '
+                        f'to which present values are calculated')
+    if runtime_settings.run_uncertainty_report and settings.emission_cost_factor_draws is None:
+        problems.append('general_inputs.csv: the uncertainty report needs a criteria_cost_factors_draws_filename or scc_cost_factors_draws_filename')
+    pairs_file_problems = check_scenario_pairs_file(settings)
+    problems += pairs_file_problems
+    files_checked = 0
+    pairings, model_runs_read = list(), 0
+    for model_run in settings.model_runs.keys():
+        if model_run not in settings.model_runs_path_dict:
+            problems.append(f'{model_run}: no run folders (see the run_folder_filename in general_inputs.csv)')
+            continue
+        framework_oem_run, nonframework_oem_run, years_to_shift = settings.model_runs_path_dict[model_run]
+        run_scenario_names = list()
+        for run_path in [framework_oem_run, nonframework_oem_run]:
+            if not run_path.is_dir():
+                problems.append(f'{run_path}: folder not found')
+                continue
+            file_problems = list()
+            for report_name in report_names:
+                file_problems += check_report_file(settings, run_path, report_name)
+                files_checked += 1
+            problems += file_problems
+            if report_names and not file_problems:
+                run_scenario_names.append(scenario_names_of(settings, run_path, report_names[0]))
+        if len(run_scenario_names) == 2:
+            pair_problems, run_pairings = check_scenario_pairs(settings, model_run, *run_scenario_names)
+            problems += pair_problems
+            pairings += [pairing + (model_run,) for pairing in run_pairings]
+            model_runs_read += 1
+    scenario_names = {pairing[0] for pairing in pairings}
+
+    # the benefit-cost calculations are relative to the base_social_name, so it must be built whenever scenarios are paired by a pairs file
+    if report_names and model_runs_read == len(settings.model_runs) and settings.scenario_pairs is not None and not pairs_file_problems \
+            and settings.base_social_name not in scenario_names:
+        problems.append(f'{settings.scenario_pairs_filename}: no pair builds the base_social_name "{settings.base_social_name}"')
+    if report_names and model_runs_read == len(settings.model_runs) and runtime_settings.scenario_names is not None:
+        unknown_names = [name for name in runtime_settings.scenario_names if name not in scenario_names]
+        if unknown_names:
+            problems.append(f'runtime_settings.csv: scenario_names {unknown_names} are not scenarios built from the reports')
+
+    if problems:
+        problems_list = '\n    '.join(problems)
+        raise PreflightError(f'{len(problems)} problem(s) found in the model run folders:\n    {problems_list}')
+
+    print(f'Preflight check of {files_checked} report files passed')
+
+    scenario_subset = runtime_settings.scenario_subset(settings)
+    return [pairing for pairing in pairings if scenario_subset is None or pairing[0] in scenario_subset]
+
+
+if __name__ == '__main__':
+    print('This module does not run as a script.')
@@ -1,6 +1,29 @@
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from itertools import repeat
 
+from tool_code.combinator_functions import ColumnProjection, GroupSum, RowFilter
 from tool_code.off_cycle_costs import calc_off_cycle_costs_in_compliance_report
+from tool_code.rollup import Rollup
+
+
+def dimensions_to_object(df):
+    """
+    Note:
+        Reports are read with categorical dimensions to save memory (see SetInputs.report_schemas). Those are converted back to object strings here
+        since groupby ordering of categoricals, and filling NaN in them, differ from that of object strings.
+
+    Parameters:
+        df: A DataFrame of a combined report.
+
+    Return:
+        A copy of the passed DataFrame with categorical columns converted to object.
+
+    """
+    categorical_cols = [col for col in df.columns if pd.api.types.is_categorical_dtype(df[col])]
+    return df.astype({col: object for col in categorical_cols})
 
 
 class ComplianceReport:
@@ -17,10 +40,41 @@ class ComplianceReport:
     def __init__(self, report_df):
         self.report_df = report_df
 
-    def new_report(self, settings):
-        df = self.report_df.copy().fillna(0)
+    @staticmethod
+    def column_projection(settings):
+        """
+
+        Parameters:
+            settings: The SetInputs class.
+
+        Return:
+            A ColumnProjection of the compliance report columns used by this class.
+
+        """
+        columns = ['Model Year', 'Manufacturer', 'Reg-Class', 'CAFE (2-cycle)', 'CO-2 Rating', 'AC Efficiency', 'AC Leakage', 'Off-Cycle Credits'] \
+                  + settings.args_to_sum + settings.args_to_sales_weight + settings.args_to_sales_vmt_weight
+        return ColumnProjection(columns=columns)
+
+    @staticmethod
+    def row_filter(settings, runtime_settings):
+        """
+
+        Parameters:
+            settings: The SetInputs class.\n
+            runtime_settings: The RuntimeSettings class.
+
+        Return:
+            A RowFilter of the model years, reg classes and manufacturers kept by new_report, narrowed to any scenario and year subsets in runtime_settings.
+
+        """
+        return RowFilter(year_ranges={'Model Year': runtime_settings.year_range(first=settings.summary_start_year)},
+                         allowed_values={'Reg-Class': ['Passenger Car', 'Light Truck', 'TOTAL']},
+                         excluded_values={'Manufacturer': ['TOTAL']},
+                         scenario_names=runtime_settings.scenario_subset(settings))
+
+    def new_report(self, settings, tag_levels=False):
+        df = dimensions_to_object(self.report_df).fillna(0)
         id_args = ['Scenario Name', 'Model Year']
-        merge_cols = ['Scenario Name', 'Model Year', 'Manufacturer', 'Reg-Class']
 
         # eliminate some total rows since those need re-calc (drop model year total row since unnecessary)
         df = pd.DataFrame(df.loc[df['Model Year'] != 'TOTAL', :])
@@ -36,51 +90,18 @@ class ComplianceReport:
         # limit reg class to pass car and light truck and TOTAL (reg class TOTAL is specific to mfr so doesn't need recalc)
         df = pd.DataFrame(df.loc[(df['Reg-Class'] == 'Passenger Car') | (df['Reg-Class'] == 'Light Truck') | (df['Reg-Class'] == 'TOTAL'), :]).reset_index(drop=True)
 
-        df_sum = pd.DataFrame(df, columns=id_args + ['Manufacturer', 'Reg-Class'] + settings.args_to_sum).reset_index(drop=True)
-        df_sales_weight = pd.DataFrame(df, columns=id_args + ['Manufacturer', 'Reg-Class', 'Sales'] + settings.args_to_sales_weight).reset_index(drop=True)
-        df_sales_vmt_weight = pd.DataFrame(df, columns=id_args + ['Manufacturer', 'Reg-Class', 'Sales'] + settings.args_to_sales_vmt_weight).reset_index(drop=True)
-
-        # work on sums
-        df_sum_regclass_totals = df_sum.groupby(by=id_args + ['Reg-Class'], as_index=False).sum()
-        df_sum_regclass_totals.insert(df_sum_regclass_totals.columns.get_loc('Reg-Class'), 'Manufacturer', 'TOTAL')
-        df_sum = pd.concat([df_sum, df_sum_regclass_totals], axis=0, ignore_index=True)
-        df_sum = df_sum.reset_index(drop=True)
-
-        # work on sales weighted averages
-        for arg in settings.args_to_sales_weight:
-            df_sales_weight.insert(len(df_sales_weight.columns), f'{arg}*Sales', df_sales_weight[arg] * df_sales_weight['Sales'])
-        df_sales_weight_regclass_totals = df_sales_weight.groupby(by=id_args + ['Reg-Class'], as_index=False).sum()
-        df_sales_weight_regclass_totals.insert(df_sales_weight_regclass_totals.columns.get_loc('Reg-Class'), 'Manufacturer', 'TOTAL')
-        df_sales_weight = pd.concat([df_sales_weight, df_sales_weight_regclass_totals], axis=0, ignore_index=True)
-        df_sales_weight = df_sales_weight.reset_index(drop=True)
-        for arg in settings.args_to_sales_weight:
-            df_sales_weight[arg] = df_sales_weight[f'{arg}*Sales'] / df_sales_weight['Sales']
-            df_sales_weight.drop(columns=f'{arg}*Sales', inplace=True)
-        df_sales_weight.drop(columns='Sales', inplace=True)
-
-        # work on sales & vmt weighted averages
-        df_sales_vmt_weight.insert(len(df_sales_vmt_weight.columns), 'Sales*VMT', 0)
-        for arg in settings.args_to_sales_vmt_weight:
-            df_sales_vmt_weight.insert(len(df_sales_vmt_weight.columns), f'{arg}*Sales*VMT', 0)
-            df_sales_vmt_weight.loc[df_sales_vmt_weight['Reg-Class'] != 'Light Truck', f'{arg}*Sales*VMT'] \
-                = df_sales_vmt_weight[arg] * df_sales_vmt_weight['Sales'] * settings.vmt_car
-            df_sales_vmt_weight.loc[df_sales_vmt_weight['Reg-Class'] == 'Light Truck', f'{arg}*Sales*VMT'] \
-                = df_sales_vmt_weight[arg] * df_sales_vmt_weight['Sales'] * settings.vmt_truck
-            df_sales_vmt_weight.loc[df_sales_vmt_weight['Reg-Class'] != 'Light Truck', 'Sales*VMT'] \
-                = df_sales_vmt_weight['Sales'] * settings.vmt_car
-            df_sales_vmt_weight.loc[df_sales_vmt_weight['Reg-Class'] == 'Light Truck', 'Sales*VMT'] \
-                = df_sales_vmt_weight['Sales'] * settings.vmt_truck
-        df_sales_vmt_weight_regclass_totals = df_sales_vmt_weight.groupby(by=id_args + ['Reg-Class'], as_index=False).sum()
-        df_sales_vmt_weight_regclass_totals.insert(df_sales_vmt_weight_regclass_totals.columns.get_loc('Reg-Class'), 'Manufacturer', 'TOTAL')
-        df_sales_vmt_weight = pd.concat([df_sales_vmt_weight, df_sales_vmt_weight_regclass_totals], axis=0, ignore_index=True)
-        df_sales_vmt_weight = df_sales_vmt_weight.reset_index(drop=True)
-        for arg in settings.args_to_sales_vmt_weight:
-            df_sales_vmt_weight[arg] = df_sales_vmt_weight[f'{arg}*Sales*VMT'] / df_sales_vmt_weight['Sales*VMT']
-            df_sales_vmt_weight.drop(columns=f'{arg}*Sales*VMT', inplace=True)
-        df_sales_vmt_weight.drop(columns='Sales*VMT', inplace=True)
-        df_sales_vmt_weight.drop(columns='Sales', inplace=True)
-
-        df = df_sum.merge(df_sales_weight, on=merge_cols, how='left').merge(df_sales_vmt_weight, on=merge_cols, how='left')
+        df = pd.DataFrame(df, columns=id_args + ['Manufacturer', 'Reg-Class'] + settings.args_to_sum
+                          + settings.args_to_sales_weight + settings.args_to_sales_vmt_weight)
+
+        # the VMT weight is that of light trucks for Light Truck rows and that of cars for all other rows
+        df['Sales*VMT'] = df['Sales'] * np.where(df['Reg-Class'] == 'Light Truck', settings.vmt_truck, settings.vmt_car)
+
+        # sum, sales weight and sales & vmt weight in a single rollup; the manufacturer-level rows are kept as they are and Manufacturer TOTAL rows
+        # are added for each reg class
+        weighted_args = {arg: 'Sales' for arg in settings.args_to_sales_weight}
+        weighted_args.update({arg: 'Sales*VMT' for arg in settings.args_to_sales_vmt_weight})
+        df = Rollup(id_args, ['Manufacturer', 'Reg-Class'], [['Reg-Class']], weighted_args, tag_levels).rollup(df, aggregate=False)
+        df.drop(columns='Sales*VMT', inplace=True)
 
         # calc off-cycle credits and adjust impacted attributes
         df = calc_off_cycle_costs_in_compliance_report(settings, df)
@@ -98,12 +119,47 @@ class CostsReport:
     def __init__(self, report_df):
         self.report_df = report_df
 
-    def new_report(self, settings):
+    @staticmethod
+    def column_projection(settings):
+        """
+
+        Parameters:
+            settings: The SetInputs class.
+
+        Return:
+            A ColumnProjection that excludes the damage and CCEMS total cost columns since those are calculated in this tool.
+
+        """
+        return ColumnProjection(exclude_columns=['Total Social Costs', 'Total Social Benefits', 'Net Social Benefits'],
+                                exclude_keywords=settings.costs_metrics_to_exclude, keep_keywords=['Property'])
+
+    @staticmethod
+    def row_filter(settings, runtime_settings, report_name):
+        """
+
+        Parameters:
+            settings: The SetInputs class.\n
+            runtime_settings: The RuntimeSettings class.\n
+            report_name: The name of the costs report (summary or full).
+
+        Return:
+            A RowFilter of the years, reg classes and undiscounted values kept by new_report, narrowed to any scenario and year subsets in runtime_settings.
+
+        """
+        year_ranges = {'Calendar Year': runtime_settings.year_range(first=settings.summary_start_year)}
+        if report_name == settings.costs_report_name:
+            year_ranges['Model Year'] = (settings.run_model_years[0], settings.run_model_years[-1])
+        return RowFilter(year_ranges=year_ranges,
+                         allowed_values={'Disc-Rate': [0]},
+                         excluded_values={'Reg-Class': ['TOTAL']},
+                         scenario_names=runtime_settings.scenario_subset(settings))
+
+    def new_report(self, settings, tag_levels=False):
         if self.report_df.columns.tolist().__contains__('Age'):
-            df = self.report_df.copy().fillna(0)
+            df = dimensions_to_object(self.report_df).fillna(0)
             id_args = ['Scenario Name', 'Model Year', 'Age', 'Calendar Year', 'Disc-Rate']
         else:
-            df = self.report_df.copy()
+            df = dimensions_to_object(self.report_df)
             id_args = ['Scenario Name', 'Calendar Year', 'Disc-Rate']
 
         # eliminate total rows since those need re-calc
@@ -116,7 +172,7 @@ class CostsReport:
             df = pd.DataFrame(df.loc[(df['Model Year'] >= settings.run_model_years[0]) &
                                      (df['Model Year'] <= settings.run_model_years[-1]), :])
 
-        # eliminate damage data since those are calculated in this tool
+        # eliminate damage data since those are calculated in this tool (these are not read when using the column_projection)
         exclude_cols = list()
         for arg in settings.costs_metrics_to_exclude:
             # arg_list = [col for col in df.columns if arg in col]
@@ -127,18 +183,11 @@ class CostsReport:
         # eliminate discounted data since those are calculated in this tool
         df = pd.DataFrame(df.loc[df['Disc-Rate'] == 0, :])
 
-        # eliminate total cost data since those are calculated in this tool
-        df.drop(columns=['Total Social Costs', 'Total Social Benefits', 'Net Social Benefits'], inplace=True)
-
-        # groupby id args along with args for which we want new totals (this combines into one fleet)
-        df = df.groupby(by=id_args + ['Reg-Class'], as_index=False).sum()
-
-        # groupby id args to get new calendar year (& age) totals
-        total = df.groupby(by=id_args, as_index=False).sum()
-        total.insert(df.columns.get_loc('Calendar Year'), 'Reg-Class', 'TOTAL')
+        # eliminate total cost data since those are calculated in this tool (these are not read when using the column_projection)
+        df.drop(columns=['Total Social Costs', 'Total Social Benefits', 'Net Social Benefits'], inplace=True, errors='ignore')
 
-        # bring everything together and return the new combined report
-        df = pd.concat([df, total], axis=0, ignore_index=True)
+        # combine into one fleet by id args and reg class and add new calendar year (& age) totals
+        df = Rollup(id_args, ['Reg-Class'], [[]], tag_levels=tag_levels).rollup(df)
 
         # determine the non-emission cost metrics
         non_emission_costs = [arg for arg in df.columns if arg not in id_args + ['Reg-Class']]
@@ -158,15 +207,59 @@ class EffectsReport:
     def __init__(self, report_df):
         self.report_df = report_df
 
-    def new_report(self, settings):
+    @staticmethod
+    def column_projection(settings):
+        """
+
+        Parameters:
+            settings: The SetInputs class.
+
+        Return:
+            A ColumnProjection that excludes the incidence data set in settings.effects_metrics_to_exclude.
+
+        """
+        return ColumnProjection(exclude_keywords=settings.effects_metrics_to_exclude)
+
+    @staticmethod
+    def chunked_aggregation():
+        """
+
+        Return:
+            A GroupSum over the id args of the full (lifetime) effects report, which new_report sums over, for streaming that report in chunks.
+
+        """
+        return GroupSum(['Scenario Name', 'Model Year', 'Age', 'Calendar Year', 'Reg-Class', 'Fuel Type'])
+
+    @staticmethod
+    def row_filter(settings, runtime_settings, report_name):
+        """
+
+        Parameters:
+            settings: The SetInputs class.\n
+            runtime_settings: The RuntimeSettings class.\n
+            report_name: The name of the effects report (summary or full).
+
+        Return:
+            A RowFilter of the years, reg classes and fuel types kept by new_report, narrowed to any scenario and year subsets in runtime_settings.
+
+        """
+        year_ranges = {'Calendar Year': runtime_settings.year_range(first=settings.summary_start_year)}
+        if report_name == settings.effects_report_name:
+            year_ranges['Model Year'] = (settings.run_model_years[0], settings.run_model_years[-1])
+        return RowFilter(year_ranges=year_ranges,
+                         excluded_values={'Reg-Class': ['TOTAL'], 'Fuel Type': ['TOTAL']},
+                         scenario_names=runtime_settings.scenario_subset(settings))
+
+    def new_report(self, settings, tag_levels=False):
         if self.report_df.columns.tolist().__contains__('Average Age'):
-            df = self.report_df.copy().fillna(0)
-            # Fleet weight the Average Age arg
-            df.insert(len(df.columns), 'Fleet*AverageAge', df[['Fleet', 'Average Age']].product(axis=1))
+            df = dimensions_to_object(self.report_df).fillna(0)
             id_args = ['Scenario Name', 'Calendar Year']
+            # Fleet weight the Average Age arg; fuel type totals are not part of the summary report
+            rollup = Rollup(id_args, ['Reg-Class', 'Fuel Type'], [['Reg-Class'], []], weighted_args={'Average Age': 'Fleet'}, tag_levels=tag_levels)
         else:
-            df = self.report_df.copy()
+            df = dimensions_to_object(self.report_df)
             id_args = ['Scenario Name', 'Model Year', 'Age', 'Calendar Year']
+            rollup = Rollup(id_args, ['Reg-Class', 'Fuel Type'], [['Fuel Type'], ['Reg-Class'], []], tag_levels=tag_levels)
 
         # eliminate total rows since those need re-calc
         df = pd.DataFrame(df.loc[df['Reg-Class'] != 'TOTAL', :]).reset_index(drop=True)
@@ -179,43 +272,35 @@ class EffectsReport:
             df = pd.DataFrame(df.loc[(df['Model Year'] >= settings.run_model_years[0]) &
                                      (df['Model Year'] <= settings.run_model_years[-1]), :])
 
-        # eliminate incidence data
+        # eliminate incidence data (these are not read when using the column_projection)
         exclude_cols = list()
         for arg in settings.effects_metrics_to_exclude:
             arg_list = [col for col in df.columns if arg in col]
             exclude_cols = exclude_cols + arg_list
         df.drop(columns=exclude_cols, inplace=True)
 
-        # groupby id args along with args for which we want new totals (this combines into one fleet)
-        df = df.groupby(by=id_args + ['Reg-Class', 'Fuel Type'], as_index=False).sum()
+        # groupby id args along with reg class and fuel type (this combines into one fleet) and add the new totals
+        df = rollup.rollup(df)
 
-        # groupby reg class to get new reg class totals
-        regclass_totals = df.groupby(by=id_args + ['Reg-Class'], as_index=False).sum()
-        regclass_totals.insert(regclass_totals.columns.get_loc('Reg-Class') + 1, 'Fuel Type', 'TOTAL')
+        return df
 
-        # groupby fuel type to get new fuel type totals, but only in the full report, not the summary report
-        if df.columns.tolist().__contains__('Average Age'):
-            pass
-        else:
-            fueltype_totals = df.groupby(by=id_args + ['Fuel Type'], as_index=False).sum()
-            fueltype_totals.insert(fueltype_totals.columns.get_loc('Fuel Type'), 'Reg-Class', 'TOTAL')
+    @staticmethod
+    def summary_of_lifetime_report(df):
+        """
 
-        # groupby to get new calendar year (& age) totals
-        total_total = df.groupby(by=id_args, as_index=False).sum()
-        total_total.insert(df.columns.get_loc('Calendar Year'), 'Fuel Type', 'TOTAL')
-        total_total.insert(df.columns.get_loc('Calendar Year'), 'Reg-Class', 'TOTAL')
+        Parameters:
+            df: A DataFrame of the combined full (model year lifetime) effects report holding every model year on the road in each calendar year.
 
-        # bring everything together
-        if self.report_df.columns.tolist().__contains__('Average Age'):
-            df = pd.concat([df, regclass_totals, total_total], axis=0, ignore_index=True)
-            # recalc the average age if appropriate
-            df['Average Age'] = df['Fleet*AverageAge'] / df['Fleet']
-            df.drop(columns='Fleet*AverageAge', inplace=True)
-        else:
-            # bring everything together
-            df = pd.concat([df, fueltype_totals, regclass_totals, total_total], axis=0, ignore_index=True)
+        Return:
+            A DataFrame laid out as the combined effects summary report, summing the passed report over model years and ages and calculating the
+            Fleet-weighted Average Age.
 
-        return df
+        """
+        df = df.drop(columns='Model Year').assign(**{'Fleet*Age': df['Fleet'] * df['Age']})
+        df = df.groupby(by=['Scenario Name', 'Calendar Year', 'Reg-Class', 'Fuel Type'], as_index=False, sort=False, observed=True).sum()
+        df['Average Age'] = df['Fleet*Age'] / df['Fleet']
+
+        return df.drop(columns=['Age', 'Fleet*Age'])
 
 
 class TechReport:
@@ -229,8 +314,25 @@ class TechReport:
     def __init__(self, report_df):
         self.report_df = report_df
 
-    def new_report(self, settings, sales_df):
-        df = self.report_df.copy()
+    @staticmethod
+    def row_filter(settings, runtime_settings):
+        """
+
+        Parameters:
+            settings: The SetInputs class.\n
+            runtime_settings: The RuntimeSettings class.
+
+        Return:
+            A RowFilter of the model years, reg classes and manufacturers kept by new_report, narrowed to any scenario and year subsets in runtime_settings.
+
+        """
+        return RowFilter(year_ranges={'Model Year': runtime_settings.year_range(first=settings.summary_start_year)},
+                         allowed_values={'Reg-Class': ['Passenger Car', 'Light Truck', 'TOTAL']},
+                         excluded_values={'Manufacturer': ['TOTAL']},
+                         scenario_names=runtime_settings.scenario_subset(settings))
+
+    def new_report(self, settings, sales_df, tag_levels=False):
+        df = dimensions_to_object(self.report_df)
         id_args = ['Scenario Name', 'Model Year']
         param_type_loc = df.columns.get_loc('Param Type')
         args = [arg for arg in df.columns[param_type_loc + 1:].tolist()]
@@ -242,49 +344,128 @@ class TechReport:
 
         # get sales from compliance report
         df = df.merge(sales_df, on=id_args + ['Manufacturer', 'Reg-Class'], how='left')
-        for arg in args:
-            df.insert(len(df.columns), f'{arg}*Sales', df[arg] * df['Sales'])
-
-        # work on sums
-        df_regclass_totals = df.groupby(by=id_args + ['Reg-Class', 'Param Type'], as_index=False).sum()
-        df_regclass_totals.insert(df_regclass_totals.columns.get_loc('Reg-Class'), 'Manufacturer', 'TOTAL')
-        df = pd.concat([df, df_regclass_totals], axis=0, ignore_index=True)
-        df = df.reset_index(drop=True)
 
-        for arg in args:
-            df[arg] = df[f'{arg}*Sales'] / df['Sales']
-            df.drop(columns=[f'{arg}*Sales'], inplace=True)
+        # sales weight the techs and add Manufacturer TOTAL rows for each reg class and param type
+        df = Rollup(id_args, ['Manufacturer', 'Reg-Class', 'Param Type'], [['Reg-Class', 'Param Type']],
+                    weighted_args={arg: 'Sales' for arg in args}, tag_levels=tag_levels).rollup(df, aggregate=False)
 
         # sum some columns
-        df = self.sum_cols(df, 'BEV', 'PHEV', 'HCR')
+        df = self.sum_cols(df, args, 'BEV', 'PHEV', 'HCR')
         df.insert(len(df.columns), 'BEV+PHEV', df[['BEV', 'PHEV']].sum(axis=1))
 
         return df
 
     @staticmethod
-    def sum_cols(df, *identifiers):
-        for identifier in identifiers:
-            df.insert(len(df.columns), identifier, df.loc[:, [x for x in df.columns if x.__contains__(identifier)]].sum(axis=1))
-        return df
+    def sum_cols(df, args, *identifiers):
+        """
+
+        Parameters:
+            df: A DataFrame of the technology utilization report.\n
+            args: A list of the tech columns of the report.\n
+            identifiers: The identifiers (e.g., 'BEV') of the groups of tech columns to sum.
+
+        Return:
+            The passed DataFrame with a column added for each identifier that sums the tech columns whose names contain that identifier.
+
+        """
+        column_groups = {identifier: [idx for idx, arg in enumerate(args) if identifier in arg] for identifier in identifiers}
+        block = df[args].to_numpy(dtype=float)
+        group_sums = pd.DataFrame({identifier: np.nansum(block[:, positions], axis=1) for identifier, positions in column_groups.items()}, index=df.index)
+        return pd.concat([df, group_sums], axis=1)
+
+
+class VehiclesReportSums(GroupSum):
+    """
+
+    The VehiclesReportSums class reduces each chunk of the vehicle-level vehicles report to the sales and sales-weighted tech costs of each scenario,
+    model year and powertrain, with flags for the SS12V and BISG techs of MHEV, so that only that small aggregate is kept as the report is read.
+
+    """
+
+    def __init__(self):
+        super().__init__(['Scenario Name', 'Model Year', 'Powertrain', 'SS12V', 'BISG'])
+
+    def prepare(self, df):
+        """
+
+        Parameters:
+            df: A scrubbed chunk of the vehicles report.
+
+        Return:
+            A DataFrame of the group_keys, Sales and Sales*Tech Cost of each vehicle in the chunk.
+
+        """
+        df = pd.DataFrame(df, columns=['Scenario Name', 'Model Year', 'Powertrain', 'Sales', 'Tech Cost', 'TechKey'])
+        for MHEV_tech in ['SS12V', 'BISG']:
+            df[MHEV_tech] = df['TechKey'].astype(str).str.contains(MHEV_tech)
+        df['Sales*Tech Cost'] = df[['Sales', 'Tech Cost']].product(axis=1)
+
+        return df[self.group_keys + ['Sales', 'Sales*Tech Cost']]
+
+    def __repr__(self):
+        return 'VehiclesReportSums()'
 
 
 class VehiclesReport:
     """
     Note:
         This class controls the summation, sales weighting, etc., of framework OEM and non-framework OEM results into a single fleet for the vehicles
-        report.
+        report. The report is reduced to the sums of VehiclesReportSums as it is read.
 
     """
 
+    cols = ['Scenario Name', 'Model Year', 'Powertrain', 'Sales', 'Tech Cost', 'TechKey']
+
     def __init__(self, report_df):
         self.report_df = report_df
 
+    @staticmethod
+    def column_projection(settings):
+        """
+
+        Parameters:
+            settings: The SetInputs class.
+
+        Return:
+            A ColumnProjection of the vehicles report columns used by this class.
+
+        """
+        return ColumnProjection(columns=VehiclesReport.cols)
+
+    @staticmethod
+    def row_filter(settings, runtime_settings):
+        """
+
+        Note:
+            Model years are not filtered since new_report finds the powertrains to report from all model years of the report.
+
+        Parameters:
+            settings: The SetInputs class.\n
+            runtime_settings: The RuntimeSettings class.
+
+        Return:
+            A RowFilter of any scenario subset in runtime_settings.
+
+        """
+        return RowFilter(scenario_names=runtime_settings.scenario_subset(settings))
+
+    @staticmethod
+    def chunked_aggregation():
+        """
+
+        Return:
+            A VehiclesReportSums object to reduce the vehicles report to the sums used by new_report as it is read.
+
+        """
+        return VehiclesReportSums()
+
     def new_report(self, settings):
         """
 
         Note:
             This method returns a DataFrame of sales-weighted costs for the different powertrain techs for each scenario and model year (those
-            specified in settings.run_model_years). It does not return the CCEMS vehicles report.
+            specified in settings.run_model_years). It does not return the CCEMS vehicles report. The report_df passed to the class must be the
+            vehicles report as reduced by VehiclesReportSums.
 
         Parameters:
             settings: The SetInputs class.
@@ -293,68 +474,136 @@ class VehiclesReport:
             A DataFrame of Sales, Sales Share, Sales-Weighted Avg Cost Add and Contribution to the cost/vehicle in each model year for each scenario.
 
         """
-        cols = ['Scenario Name', 'Model Year', 'Manufacturer', 'Powertrain', 'Tech Class', 'Sales', 'Tech Cost', 'TechKey']
-        df = pd.DataFrame(self.report_df, columns=cols)
+        df = dimensions_to_object(self.report_df)
         scenario_names = pd.Series(df['Scenario Name']).unique()
-        manufacturers = pd.Series(df['Manufacturer']).unique()
         powertrains = pd.Series(df['Powertrain']).unique()
-        tech_classes = pd.Series(df['Tech Class']).unique()
-        id_args = ['Scenario Name', 'Model Year', 'Powertrain']
-
-        return_df = pd.DataFrame(columns=['Scenario Name', 'Model Year', 'Powertrain', 'Sales', 'Share', 'SalesWtdAvg_Cost_Add', 'Contribution to $/veh'])
-        for scenario_name in scenario_names:
-            for model_year in settings.run_model_years:
-                my_data = df.loc[(df['Scenario Name'] == scenario_name) & (df['Model Year'] == model_year), :]
-                my_sales = my_data['Sales'].sum(axis=0)
-                for powertrain in powertrains:
-                    if powertrain != 'MHEV':
-                        tech_data = my_data.loc[my_data['Powertrain'] == powertrain, :]
-                        tech_sales, wtd_avg_cost = self.calc_results(tech_data)
-                        share = tech_sales / my_sales
-                        contribution = wtd_avg_cost * share
-                        new_data = pd.DataFrame({'Scenario Name': [scenario_name],
-                                                 'Model Year': [model_year],
-                                                 'Powertrain': [powertrain],
-                                                 'Sales': [tech_sales],
-                                                 'Share': [share],
-                                                 'SalesWtdAvg_Cost_Add': [wtd_avg_cost],
-                                                 'Contribution to $/veh': [contribution],
-                                                 })
-                        return_df = pd.concat([return_df, new_data], ignore_index=True, axis=0)
-                    else:
-                        for MHEV_tech in ['SS12V', 'BISG']:
-                            tech_data = my_data.loc[my_data['TechKey'].str.contains(MHEV_tech)]
-                            tech_sales, wtd_avg_cost = self.calc_results(tech_data)
-                            share = tech_sales / my_sales
-                            contribution = wtd_avg_cost * share
-                            new_data = pd.DataFrame({'Scenario Name': [scenario_name],
-                                                     'Model Year': [model_year],
-                                                     'Powertrain': [MHEV_tech],
-                                                     'Sales': [tech_sales],
-                                                     'Share': [share],
-                                                     'SalesWtdAvg_Cost_Add': [wtd_avg_cost],
-                                                     'Contribution to $/veh': [contribution],
-                                                     })
-                            return_df = pd.concat([return_df, new_data], ignore_index=True, axis=0)
+        df = pd.DataFrame(df.loc[df['Model Year'].isin(settings.run_model_years), :])
+
+        # the powertrain rows of each scenario and model year in report order, with MHEV reported by its SS12V and BISG techs
+        labels, powertrain_positions = list(), dict()
+        for powertrain in powertrains:
+            if powertrain == 'MHEV':
+                mhev_positions = {MHEV_tech: len(labels) + idx for idx, MHEV_tech in enumerate(['SS12V', 'BISG'])}
+                labels += ['SS12V', 'BISG']
+            else:
+                powertrain_positions[powertrain] = len(labels)
+                labels.append(powertrain)
+
+        # label each row by the position of its powertrain row; rows having an MHEV tech count toward that MHEV tech as well as their powertrain
+        labeled_frames = [df.loc[df['Powertrain'] != 'MHEV', :].assign(Label=df['Powertrain'].map(powertrain_positions))]
+        if 'MHEV' in powertrains:
+            labeled_frames += [df.loc[df[MHEV_tech], :].assign(Label=position) for MHEV_tech, position in mhev_positions.items()]
+        labeled = pd.concat(labeled_frames, axis=0, ignore_index=True)
+
+        # sum each powertrain row of each scenario and model year, including those having no sales
+        index = pd.MultiIndex.from_product([scenario_names, settings.run_model_years, range(len(labels))], names=['Scenario Name', 'Model Year', 'Label'])
+        sums = labeled.groupby(by=['Scenario Name', 'Model Year', 'Label'])[['Sales', 'Sales*Tech Cost']].sum().reindex(index, fill_value=0)
+        my_sales = df.groupby(by=['Scenario Name', 'Model Year'])['Sales'].sum().reindex(index.droplevel('Label'), fill_value=0)
+
+        share = sums['Sales'].values / my_sales.values
+        wtd_avg_cost = sums['Sales*Tech Cost'].values / sums['Sales'].values
+        return_df = pd.DataFrame({'Scenario Name': index.get_level_values('Scenario Name'),
+                                  'Model Year': index.get_level_values('Model Year'),
+                                  'Powertrain': [labels[position] for position in index.get_level_values('Label')],
+                                  'Sales': sums['Sales'].values,
+                                  'Share': share,
+                                  'SalesWtdAvg_Cost_Add': wtd_avg_cost,
+                                  'Contribution to $/veh': wtd_avg_cost * share,
+                                  })
 
         return return_df
 
-    @staticmethod
-    def calc_results(tech_data):
-        """
 
-        Parameters:
-            tech_data: A DataFrame of powertrain specific data for a given scenario and model year.
+def new_report_of_partition(report_class, report_df, settings, *frames):
+    """
 
-        Return:
-            The sales of vehicles with the given powertrain tech and the sales-weighted average cost of that powertrain tech.
+    Parameters:
+        report_class: One of the report classes (e.g., ComplianceReport).\n
+        report_df: A DataFrame of the report rows of a single scenario.\n
+        settings: The SetInputs class.\n
+        frames: Any DataFrames, limited to the same scenario, passed to new_report after settings (e.g., the sales of the TechReport).
 
-        """
-        weighted_cost = tech_data[['Sales', 'Tech Cost']].product(axis=1).sum(axis=0)
-        tech_sales = tech_data['Sales'].sum(axis=0)
-        wtd_avg_cost = weighted_cost / tech_sales
+    Return:
+        The new_report of the report_class for the passed scenario, with the level of each row tagged (see Rollup). This is the unit of work handed to
+        each worker by new_report_by_scenario.
 
-        return tech_sales, wtd_avg_cost
+    """
+    return report_class(report_df).new_report(settings, *frames, tag_levels=True)
+
+
+def in_single_process_order(df, scenario_names):
+    """
+    Note:
+        When a report is calculated at once, each Rollup level follows the one before it and holds every scenario; the scenarios of a grouped level
+        are sorted by name (as the groupby sorts them) while those of a level kept as passed are in the order in which they appear in the report.
+        Within a level and scenario, rows are in the same order either way.
+
+    Parameters:
+        df: A DataFrame of the new_report of each scenario, concatenated, with the level of each row tagged (see Rollup).\n
+        scenario_names: A list of the scenario names in the order in which they appear in the report.
+
+    Return:
+        The passed DataFrame in the row order of a new_report of all scenarios at once, with the level tags dropped.
+
+    """
+    level, grouped = [df[col].to_numpy() for col in Rollup.level_cols]
+    scenario_name = df['Scenario Name'].astype(object)
+    appearance_rank = scenario_name.map({name: rank for rank, name in enumerate(scenario_names)}).to_numpy()
+    sorted_rank = scenario_name.map({name: rank for rank, name in enumerate(sorted(scenario_names))}).to_numpy()
+    order = np.lexsort((np.where(grouped, sorted_rank, appearance_rank), level))
+    return df.drop(columns=Rollup.level_cols).take(order).reset_index(drop=True)
+
+
+def scenario_partitions(df, scenario_names):
+    """
+
+    Parameters:
+        df: A DataFrame having a Scenario Name column.\n
+        scenario_names: A list of scenario names.
+
+    Return:
+        A list of the rows of the passed DataFrame for each of the scenario_names, empty for a scenario not in the DataFrame.
+
+    """
+    rows = df.groupby('Scenario Name', sort=False, observed=True).indices
+    return [df.iloc[rows[scenario_name]] if scenario_name in rows else df.iloc[0:0] for scenario_name in scenario_names]
+
+
+def new_report_by_scenario(report_class, report_df, settings, workers=1, *frames):
+    """
+    Note:
+        The totals and weighted averages of each combined scenario are independent of those of every other scenario, so when workers is greater
+        than 1 the report is split by Scenario Name and the new_report of each scenario is run in its own process. The results are concatenated and
+        put back in the row order of a single calculation (see in_single_process_order), so the report is the same regardless of the number of
+        workers.
+
+    Parameters:
+        report_class: One of ComplianceReport, CostsReport, EffectsReport or TechReport.\n
+        report_df: A DataFrame of the combined report.\n
+        settings: The SetInputs class.\n
+        workers: The number of processes to use (the report_workers runtime setting).\n
+        frames: Any DataFrames having a Scenario Name column passed to new_report after settings (e.g., the sales of the TechReport); these are split
+        by scenario along with the report.
+
+    Return:
+        The new_report of the report_class for all scenarios of the report.
+
+    """
+    scenario_names = pd.Series(report_df['Scenario Name']).unique()
+    if workers <= 1 or len(scenario_names) <= 1:
+        return report_class(report_df).new_report(settings, *frames)
+
+    # worker processes are spawned rather than forked since the prefetch thread may be running
+    with ProcessPoolExecutor(max_workers=min(workers, len(scenario_names)), mp_context=get_context('spawn')) as executor:
+        results = list(executor.map(new_report_of_partition, repeat(report_class), scenario_partitions(report_df, scenario_names), repeat(settings),
+                                    *[scenario_partitions(frame, scenario_names) for frame in frames]))
+
+    # CostsReport returns the report along with its non-emission cost args, which are the same for every scenario
+    if isinstance(results[0], tuple):
+        df = in_single_process_order(pd.concat([result[0] for result in results], axis=0, ignore_index=True), scenario_names)
+        non_emission_costs = [arg for arg in results[0][1] if arg not in Rollup.level_cols]
+        return (df, non_emission_costs) + results[0][2:]
+    return in_single_process_order(pd.concat(results, axis=0, ignore_index=True), scenario_names)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,377 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from tool_code.combinator_functions import read_files_and_combine_scenarios, convert_to_ustons, find_report_file, open_report
+from tool_code.report_classes import ComplianceReport, CostsReport, EffectsReport, TechReport, VehiclesReport, new_report_by_scenario
+from tool_code.emission_costs import calc_emission_costs
+from tool_code.energy_security import calc_energy_security_costs
+from tool_code.discounting import discount_values, sum_to_calendar_years
+from tool_code.uncertainty import calc_uncertainty_report
+from tool_code.new_effects import calc_new_fatality_metrics, calc_new_effects
+from tool_code.off_cycle_costs import calc_new_tech_costs_in_cost_summary_report, calc_new_tech_costs_in_cost_report
+from tool_code.scenario_dimension import ScenarioDimension
+
+
+class ReportStore:
+    """
+
+    The ReportStore class reads and combines each CCEMS report, and builds each frame derived from those reports, the first time it is asked for and
+    keeps it for the rest of the tool run. No report is parsed twice in a run and the stages of the combinator can be run in any order since each stage
+    pulls what it needs from the store.
+
+    Note:
+        Frames are named as in the combinator (e.g., 'combined_compliance_report', 'inventory', 'discounted_costs_report'). Frames held by the store are
+        shared by every stage that asks for them and so must not be modified in place; builders copy a frame before passing it to a function that does.
+        When the prefetch_reports runtime setting is on, the next report in the prefetch order is read on a background thread while the current
+        stage computes; only one report is read ahead so that prefetching does not hold more than one extra report in memory.
+        When the derive_summary_reports runtime setting is on and a full (model year lifetime) report is needed anyway, the summary report is
+        derived from the full report rather than read, provided that every model year on the road in each calendar year of the summary is in the
+        full report as read, which holds only the run model years (see summary_coverage_problem); otherwise the summary report is read as usual.
+        The effects summary report is summed from the full effects report. The discounted costs summary is summed from the discounted costs of the
+        full costs report, which have already been through the emission, energy security and discounting calculations, so that those calculations
+        are not run again at the summary grain; only the present and annualized values are calculated from the sums (see sum_to_calendar_years).
+        Each combined scenario read is added to the scenarios dimension table. The cost builders key their calculations by the integer Scenario ID
+        of that table and attach the scenario names to the frames they return.
+
+    """
+
+    def __init__(self, settings, runtime_settings, ingest_cache=None):
+        self.settings = settings
+        self.runtime_settings = runtime_settings
+        self.ingest_cache = ingest_cache
+        self.inventory_summary_id_cols = ['Scenario Name', 'Calendar Year', 'Reg-Class', 'Fuel Type']
+        self.inventory_id_cols = ['Scenario Name', 'Model Year', 'Age', 'Calendar Year', 'Reg-Class', 'Fuel Type']
+        self.scenarios = ScenarioDimension()
+        self.reports = dict()
+        self.frames = dict()
+        self.prefetch_order = list()
+        self.pending = dict()
+        self.executor = ThreadPoolExecutor(max_workers=1) if runtime_settings.prefetch_reports else None
+        # the summary report derived from each full report when the derive_summary_reports runtime setting is on, and whether it can be
+        self.lifetime_reports = dict()
+        self.derivable = dict()
+        if runtime_settings.derive_summary_reports:
+            if runtime_settings.run_effects_report or runtime_settings.run_costs_report:
+                self.lifetime_reports[settings.effects_summary_report_name] = settings.effects_report_name
+            if runtime_settings.run_costs_report:
+                self.lifetime_reports[settings.costs_summary_report_name] = settings.costs_report_name
+        self.builders = {
+            'combined_compliance_report': self.build_combined_compliance_report,
+            'tech_sales': self.build_tech_sales,
+            'effects_summary_ustons': self.build_effects_summary_ustons,
+            'inventory_summary': self.build_inventory_summary,
+            'combined_effects_summary_report': self.build_combined_effects_summary_report,
+            'effects_ustons': self.build_effects_ustons,
+            'inventory': self.build_inventory,
+            'combined_effects_report': self.build_combined_effects_report,
+            'costs_summary_report': self.build_costs_summary_report,
+            'costs_report': self.build_costs_report,
+            'discounted_costs_summary_report': self.build_discounted_costs_summary_report,
+            'discounted_costs_report': self.build_discounted_costs_report,
+            'uncertainty_report': self.build_uncertainty_report,
+            'tech_pens_report': self.build_tech_pens_report,
+            'combined_vehicles_report': self.build_combined_vehicles_report,
+        }
+
+    def read_options(self, report_name):
+        """
+
+        Parameters:
+            report_name: The name of the CCEMS report.
+
+        Return:
+            A dictionary of the usecols, row_filter, chunksize and aggregation arguments to use when reading the given report.
+
+        """
+        settings, runtime_settings = self.settings, self.runtime_settings
+        options = {'chunksize': runtime_settings.ingest_chunksize if runtime_settings.ingest_chunksize else None}
+        if report_name == settings.compliance_report_name:
+            options.update({'usecols': ComplianceReport.column_projection(settings), 'row_filter': ComplianceReport.row_filter(settings, runtime_settings)})
+        elif report_name in [settings.effects_summary_report_name, settings.effects_report_name]:
+            options.update({'usecols': EffectsReport.column_projection(settings),
+                            'row_filter': EffectsReport.row_filter(settings, runtime_settings, report_name)})
+            # the full effects report is the largest report so it is summed as it is read when it is read in chunks
+            if report_name == settings.effects_report_name and options['chunksize']:
+                options['aggregation'] = EffectsReport.chunked_aggregation()
+        elif report_name in [settings.costs_summary_report_name, settings.costs_report_name]:
+            options.update({'usecols': CostsReport.column_projection(settings),
+                            'row_filter': CostsReport.row_filter(settings, runtime_settings, report_name)})
+        elif report_name == settings.tech_pens_report_name:
+            options.update({'row_filter': TechReport.row_filter(settings, runtime_settings)})
+        elif report_name == settings.vehicles_report_name:
+            options.update({'usecols': VehiclesReport.column_projection(settings), 'row_filter': VehiclesReport.row_filter(settings, runtime_settings)})
+            # only the sums used by the report class are kept of the vehicle-level vehicles report, whether or not it is read in chunks
+            options['aggregation'] = VehiclesReport.chunked_aggregation()
+        return options
+
+    def report(self, report_name):
+        """
+
+        Parameters:
+            report_name: The name of the CCEMS report.
+
+        Return:
+            A DataFrame combining the Framework and NonFramework OEM scenario results of the given report for all model runs, read the first time it is asked for.
+
+        """
+        if report_name not in self.reports:
+            if report_name == self.settings.effects_summary_report_name and self.summary_derivable(report_name):
+                self.reports[report_name] = self.derive_effects_summary_report()
+            elif report_name in self.pending:
+                self.reports[report_name] = self.pending.pop(report_name).result()
+            else:
+                self.reports[report_name] = self.read(report_name)
+            self.prefetch_next()
+        return self.reports[report_name]
+
+    def summary_coverage_problem(self, df):
+        """
+
+        Parameters:
+            df: A DataFrame of a combined full (model year lifetime) report, read with the run model years.
+
+        Return:
+            A description of why the summary report cannot be derived from the passed report, or None if it can. It can be when the model years of
+            the report are contiguous, the first model year plus the oldest age is not after the first calendar year of the summary, and the last
+            calendar year of the summary (the end_year runtime setting, if set, else the last calendar year of the report) is not after the last
+            model year, so that every model year on the road in each calendar year of the summary is in the report.
+
+        """
+        if not len(df):
+            return 'the full report is empty'
+        if 'Fuel Type' in df.columns and 'Fleet' not in df.columns:
+            return 'the full report has no Fleet column to weight the Average Age by'
+        model_years = set(df['Model Year'].unique())
+        first_model_year, last_model_year, oldest_age = min(model_years), max(model_years), df['Age'].max()
+        first_calendar_year, last_calendar_year = self.runtime_settings.year_range(first=self.settings.summary_start_year)
+        last_calendar_year = df['Calendar Year'].max() if last_calendar_year is None else last_calendar_year
+        if len(model_years) != last_model_year - first_model_year + 1:
+            return f'model years {first_model_year} to {last_model_year} are not contiguous'
+        if first_model_year + oldest_age > first_calendar_year:
+            return f'model years before {first_model_year} are not in the report but are on the road up to age {oldest_age} ' \
+                   f'in calendar year {first_calendar_year}'
+        if last_calendar_year > last_model_year:
+            return f'the last calendar year {last_calendar_year} is after the last model year {last_model_year}'
+        return None
+
+    def summary_derivable(self, report_name):
+        """
+
+        Parameters:
+            report_name: The name of a CCEMS summary report.
+
+        Return:
+            True if the summary report is derived from its full report, which is the case when the summary report is in self.lifetime_reports and the
+            model year coverage of the full report allows it; the full report is read, and the outcome reported, the first time this is asked.
+
+        """
+        if report_name not in self.lifetime_reports:
+            return False
+        if report_name not in self.derivable:
+            problem = self.summary_coverage_problem(self.report(self.lifetime_reports[report_name]))
+            if problem:
+                print(f'    {report_name} will be read since it cannot be derived from {self.lifetime_reports[report_name]}: {problem}')
+            else:
+                print(f'    {report_name} derived from {self.lifetime_reports[report_name]}')
+            self.derivable[report_name] = problem is None
+        return self.derivable[report_name]
+
+    def derive_effects_summary_report(self):
+        """
+
+        Return:
+            A DataFrame of the effects summary report derived from the full effects report, with the columns in the order of the summary report.
+
+        """
+        settings = self.settings
+        df = EffectsReport.summary_of_lifetime_report(self.report(settings.effects_report_name))
+        header = self.summary_header(settings.effects_summary_report_name)
+        return df[[col for col in header if col in df.columns] + [col for col in df.columns if col not in header]]
+
+    def summary_header(self, report_name):
+        """
+
+        Parameters:
+            report_name: The name of a CCEMS summary report in self.lifetime_reports.
+
+        Return:
+            A list of the columns of the summary report file of the first model run, read from its header only, so that a derived summary report
+            has the columns (e.g., Average Age) in the order of the summary report read.
+
+        """
+        framework_oem_run = next(iter(self.settings.model_runs_path_dict.values()))[0]
+        with open_report(find_report_file(framework_oem_run, report_name)) as source:
+            return pd.read_csv(source, nrows=0).columns.tolist()
+
+    def read(self, report_name):
+        df = read_files_and_combine_scenarios(self.settings, report_name, self.runtime_settings.ingest_workers, self.ingest_cache,
+                                              scenarios=self.scenarios, **self.read_options(report_name))
+        return df.reset_index(drop=True)
+
+    def prefetch(self, report_names):
+        """
+
+        Parameters:
+            report_names: A list of the names of the CCEMS reports in the order in which the stages will ask for them.
+
+        Return:
+            Nothing, but the first report not yet read is read on a background thread if the prefetch_reports runtime setting is on.
+
+        """
+        # derived summary reports are read only if they turn out not to be derivable, so they are not read ahead
+        self.prefetch_order = [report_name for report_name in report_names if report_name not in self.lifetime_reports]
+        self.prefetch_next()
+
+    def prefetch_next(self):
+        if self.executor is None or self.pending:
+            return
+        for report_name in self.prefetch_order:
+            if report_name not in self.reports:
+                self.pending[report_name] = self.executor.submit(self.read, report_name)
+                return
+
+    def close(self):
+        """
+
+        Return:
+            Nothing, but the background thread used for prefetching, if any, is shut down once any report it is reading has been read.
+
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.pending = dict()
+
+    def get(self, name):
+        """
+
+        Parameters:
+            name: The name of a frame in self.builders.
+
+        Return:
+            The named frame, built the first time it is asked for.
+
+        """
+        if name not in self.frames:
+            self.frames[name] = self.builders[name]()
+        return self.frames[name]
+
+    def build_combined_compliance_report(self):
+        return new_report_by_scenario(ComplianceReport, self.report(self.settings.compliance_report_name), self.settings, self.runtime_settings.report_workers)
+
+    def build_tech_sales(self):
+        cols = ['Scenario Name', 'Model Year', 'Manufacturer', 'Reg-Class', 'Sales']
+        # sales come from the new compliance report when it is part of the run, otherwise from the combined CCEMS compliance reports
+        if self.runtime_settings.run_compliance_report:
+            return self.get('combined_compliance_report')[cols]
+        df = self.report(self.settings.compliance_report_name)
+        df = pd.DataFrame(df.loc[df['Model Year'] != 'TOTAL', :])
+        df = pd.DataFrame(df.loc[df['Manufacturer'] != 'TOTAL', :])
+        df['Model Year'] = df['Model Year'].astype(int)
+        return df[cols]
+
+    def build_effects_summary_ustons(self):
+        df = new_report_by_scenario(EffectsReport, self.report(self.settings.effects_summary_report_name), self.settings, self.runtime_settings.report_workers)
+        return convert_to_ustons(self.settings, df)
+
+    def build_inventory_summary(self):
+        return self.inventory_of(self.get('effects_summary_ustons'), self.inventory_summary_id_cols)
+
+    def build_combined_effects_summary_report(self):
+        df = calc_new_fatality_metrics(self.get('effects_summary_ustons').copy())
+        return calc_new_effects(self.settings, df, self.inventory_summary_id_cols)
+
+    def build_effects_ustons(self):
+        df = new_report_by_scenario(EffectsReport, self.report(self.settings.effects_report_name), self.settings, self.runtime_settings.report_workers)
+        return convert_to_ustons(self.settings, df)
+
+    def build_inventory(self):
+        return self.inventory_of(self.get('effects_ustons'), self.inventory_id_cols)
+
+    def build_combined_effects_report(self):
+        df = calc_new_fatality_metrics(self.get('effects_ustons').copy())
+        return calc_new_effects(self.settings, df, self.inventory_id_cols)
+
+    def build_costs_summary_report(self):
+        return new_report_by_scenario(CostsReport, self.report(self.settings.costs_summary_report_name), self.settings, self.runtime_settings.report_workers)
+
+    def build_costs_report(self):
+        return new_report_by_scenario(CostsReport, self.report(self.settings.costs_report_name), self.settings, self.runtime_settings.report_workers)
+
+    def build_discounted_costs_summary_report(self):
+        if self.summary_derivable(self.settings.costs_summary_report_name):
+            return self.discounted_costs_summary_of_lifetime()
+        return self._discounted_costs('costs_summary_report', self.inventory_summary_id_cols, 'inventory_summary',
+                                      'combined_effects_summary_report', calc_new_tech_costs_in_cost_summary_report)
+
+    def build_discounted_costs_report(self):
+        return self._discounted_costs('costs_report', self.inventory_id_cols, 'inventory', 'combined_effects_report',
+                                      calc_new_tech_costs_in_cost_report)
+
+    def discounted_costs_summary_of_lifetime(self):
+        settings, scenarios = self.settings, self.scenarios
+        id_cols = scenarios.encoded_cols(['Scenario Name', 'Calendar Year', 'Reg-Class'])
+        discounted_costs = scenarios.encode(self.get('discounted_costs_report')[0])
+        discounted_frames = sum_to_calendar_years(settings, discounted_costs, id_cols, *self.get('costs_report')[1],
+                                                  no_action=scenarios.id_of(settings.base_social_name))
+        return tuple(scenarios.decode(frame) for frame in discounted_frames)
+
+    def _discounted_costs(self, costs_name, inventory_id_cols, inventory_name, effects_name, calc_new_tech_costs):
+        """
+
+        Parameters:
+            costs_name: The name of the combined costs frame ('costs_summary_report' or 'costs_report').\n
+            inventory_id_cols: The id columns of the inventory of the report (self.inventory_summary_id_cols or self.inventory_id_cols).\n
+            inventory_name: The name of the inventory frame of the report ('inventory_summary' or 'inventory').\n
+            effects_name: The name of the combined effects frame of the report ('combined_effects_summary_report' or 'combined_effects_report').\n
+            calc_new_tech_costs: The off-cycle costs function of the report (calc_new_tech_costs_in_cost_summary_report or
+            calc_new_tech_costs_in_cost_report).
+
+        Return:
+            The discounted costs, present values and annualized values of the given costs report, with scenarios identified by Scenario Name.
+
+        """
+        settings, scenarios = self.settings, self.scenarios
+        id_cols = scenarios.encoded_cols(inventory_id_cols)
+        id_cols_no_fuel = [arg for arg in id_cols if 'Fuel' not in arg]  # cost reports do not have fuel type, but it was used to calc damages
+        df, non_emission_costs = self.get(costs_name)
+        df = scenarios.encode(df)
+        new_emission_costs = calc_emission_costs(settings, scenarios.encode(self.get(inventory_name)), df, id_cols)
+        df = new_emission_costs.merge(df, on=id_cols_no_fuel + ['Disc-Rate'], how='left')
+        df = calc_new_tech_costs(df, scenarios.encode(self.get('combined_compliance_report')))
+        energy_security_costs = calc_energy_security_costs(settings, scenarios.encode(self.get(effects_name)), df, id_cols)
+        df = df.drop(columns='Petroleum Market Externalities').merge(energy_security_costs, on=id_cols_no_fuel + ['Disc-Rate'], how='left')
+        discounted_frames = discount_values(settings, df, id_cols_no_fuel, [0.03, 0.07], *non_emission_costs,
+                                            no_action=scenarios.id_of(settings.base_social_name))
+        return tuple(scenarios.decode(frame) for frame in discounted_frames)
+
+    def build_uncertainty_report(self):
+        settings, scenarios = self.settings, self.scenarios
+        present_values = scenarios.encode(self.get('discounted_costs_summary_report')[1])
+        df = calc_uncertainty_report(settings, scenarios.encode(self.get('inventory_summary')), present_values,
+                                     no_action=scenarios.id_of(settings.base_social_name))
+        return scenarios.decode(df)
+
+    def build_tech_pens_report(self):
+        return new_report_by_scenario(TechReport, self.report(self.settings.tech_pens_report_name), self.settings, self.runtime_settings.report_workers,
+                                      self.get('tech_sales'))
+
+    def build_combined_vehicles_report(self):
+        return VehiclesReport(self.report(self.settings.vehicles_report_name)).new_report(self.settings)
+
+    @staticmethod
+    def inventory_of(df, id_cols):
+        """
+
+        Parameters:
+            df: An effects report DataFrame with inventories converted to US tons.\n
+            id_cols: The id columns of the inventory.
+
+        Return:
+            A DataFrame of CAP and GHG inventories for recalc of damages.
+
+        """
+        cols = id_cols + [col for col in df.columns if '(t)' in col or '(mmt)' in col or '(ustons)' in col]
+        return pd.DataFrame(df.loc[(df['Fuel Type'] != 'TOTAL') & (df['Reg-Class'] != 'TOTAL'), :], columns=cols).reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    print('This module does not run as a script.')
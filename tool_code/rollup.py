@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+
+class Rollup:
+    """
+
+    The Rollup class builds the TOTAL rows of a report from grouping sets of its dimensions. Every total level is summed from the finest level of the
+    report, so the report is grouped once at its finest level rather than once per total level, and weighted averages are carried as weighted sums
+    through every level and divided back by their weights at the end.
+
+    Note:
+        Each grouping set lists the dimensions kept in a total level; the dimensions not kept are set to 'TOTAL' in that level. For example, grouping
+        sets of [['Fuel Type'], ['Reg-Class'], []] over the dimensions ['Reg-Class', 'Fuel Type'] give Fuel Type totals, Reg-Class totals and the
+        grand total. Levels are concatenated in the order of the grouping sets after the finest level. Weighted args sharing a weight are weighted
+        and divided back as one NumPy block so that reports with hundreds of weighted args (e.g., the technology utilization report) are not
+        handled one column at a time.
+        When tag_levels is True (as it is for the reports calculated by new_report_by_scenario), each row is tagged with the level it belongs to and
+        whether that level was grouped (and so sorted by its keys) or kept as passed, so that reports calculated scenario by scenario can be put back
+        in the row order of a single calculation.
+
+    """
+
+    level_cols = ['Rollup Level', 'Rollup Grouped']
+
+    def __init__(self, id_args, dimensions, grouping_sets, weighted_args=None, tag_levels=False):
+        """
+
+        Parameters:
+            id_args: A list of the columns grouped by in every level (e.g., Scenario Name and Calendar Year).\n
+            dimensions: A list of the columns that are rolled up to 'TOTAL'.\n
+            grouping_sets: A list of lists of the dimensions kept in each total level, in the order in which the levels are to be returned.\n
+            weighted_args: A dictionary of {arg: weight column} of args that are averaged weighted by the weight column, or None.\n
+            tag_levels: True to tag each row with its level (see level_cols).
+
+        """
+        self.id_args = id_args
+        self.dimensions = dimensions
+        self.grouping_sets = grouping_sets
+        self.weighted_args = weighted_args if weighted_args else dict()
+        self.tag_levels = tag_levels
+
+    @staticmethod
+    def value_cols(df, keys):
+        """
+
+        Parameters:
+            df: A DataFrame.\n
+            keys: A list of the columns grouped by.
+
+        Return:
+            A list of the numeric columns of the passed DataFrame other than the keys, those being the columns a groupby-sum would sum.
+
+        """
+        return [col for col in df.columns if col not in keys and pd.api.types.is_numeric_dtype(df[col])]
+
+    def sum_by(self, df, keys):
+        return df.groupby(by=keys, as_index=False)[self.value_cols(df, keys)].sum()
+
+    def args_by_weight(self):
+        """
+
+        Return:
+            A dictionary of {weight column: list of weighted args} of the weighted_args.
+
+        """
+        args_by_weight = dict()
+        for arg, weight in self.weighted_args.items():
+            args_by_weight.setdefault(weight, list()).append(arg)
+        return args_by_weight
+
+    def weight(self, df):
+        """
+
+        Parameters:
+            df: A DataFrame of the report.
+
+        Return:
+            The passed DataFrame with a weighted sum column of each weighted arg added (e.g., 'Average Age*Fleet').
+
+        """
+        weighted_sums = list()
+        for weight, args in self.args_by_weight().items():
+            block = df[args].to_numpy(dtype=float) * df[weight].to_numpy(dtype=float)[:, np.newaxis]
+            weighted_sums.append(pd.DataFrame(block, columns=[f'{arg}*{weight}' for arg in args], index=df.index))
+        return pd.concat([df] + weighted_sums, axis=1)
+
+    def unweight(self, df):
+        """
+
+        Parameters:
+            df: A DataFrame of the report with weighted sum columns.
+
+        Return:
+            The passed DataFrame with each weighted arg recalculated from its weighted sum and weight, and the weighted sum columns dropped.
+
+        """
+        for weight, args in self.args_by_weight().items():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                block = df[[f'{arg}*{weight}' for arg in args]].to_numpy(dtype=float) / df[weight].to_numpy(dtype=float)[:, np.newaxis]
+            df[args] = block
+        return df.drop(columns=[f'{arg}*{weight}' for arg, weight in self.weighted_args.items()])
+
+    def rollup(self, df, aggregate=True):
+        """
+
+        Parameters:
+            df: A DataFrame of the report.\n
+            aggregate: True to first sum the report to its finest level (id_args and all dimensions), False if the rows passed are already at that level
+            and are to be kept as passed.
+
+        Return:
+            A DataFrame of the finest level of the report followed by the total level of each grouping set, with weighted args recalculated in every row.
+
+        """
+        df = self.weight(df)
+        if aggregate:
+            df = self.sum_by(df, self.id_args + self.dimensions)
+
+        levels = [df]
+        for grouping_set in self.grouping_sets:
+            level = self.sum_by(df, self.id_args + list(grouping_set))
+            for dimension in self.dimensions:
+                if dimension not in grouping_set:
+                    level[dimension] = 'TOTAL'
+            levels.append(pd.DataFrame(level, columns=df.columns))
+        if self.tag_levels:
+            levels = [level.assign(**dict(zip(self.level_cols, [level_index, aggregate or level_index > 0])))
+                      for level_index, level in enumerate(levels)]
+        df = pd.concat(levels, axis=0, ignore_index=True)
+
+        return self.unweight(df)
+
+
+def sum_to_costs_keys(df, inv_df, costs_df, id_cols):
+    """
+
+    Parameters:
+        df: A DataFrame of costs aligned with the rows of the passed inventory.\n
+        inv_df: A DataFrame of inventories keyed by id_cols.\n
+        costs_df: A DataFrame based on one of the output cost reports.\n
+        id_cols: A List of the identifying columns of the inventory; the costs_df is keyed by those other than Fuel Type plus Disc-Rate.
+
+    Return:
+        A DataFrame of the passed costs summed over fuel types for each key of the costs_df, with the reg class TOTAL keys summed over reg classes;
+        the keys other than TOTAL come first, in the order of the costs_df, followed by the TOTAL keys.
+
+    """
+    costs_id_cols = [arg for arg in id_cols if 'Fuel' not in arg] + ['Disc-Rate']
+    costs_args = df.columns.tolist()
+
+    # the inventory is undiscounted
+    df = pd.concat([inv_df[[arg for arg in id_cols if 'Fuel' not in arg]], df], axis=1)
+    if 'Disc-Rate' not in df.columns:
+        df['Disc-Rate'] = 0
+    df['Reg-Class'] = df['Reg-Class'].astype(object)
+    df = Rollup([arg for arg in costs_id_cols if arg != 'Reg-Class'], ['Reg-Class'], [[]]).rollup(df)
+
+    costs_keys = costs_df[costs_id_cols].drop_duplicates()
+    is_total = (costs_keys['Reg-Class'] == 'TOTAL').to_numpy()
+    costs_keys = pd.concat([costs_keys.loc[~is_total, :], costs_keys.loc[is_total, :]], axis=0, ignore_index=True)
+    return_df = costs_keys.merge(df, on=costs_id_cols, how='left', indicator=True)
+    missing = return_df['_merge'] == 'left_only'
+    if missing.any():
+        missing_keys = return_df.loc[missing, costs_id_cols].itertuples(index=False, name=None)
+        raise KeyError(f'No inventory for costs keys {list(missing_keys)[:10]}')
+    return return_df[costs_id_cols + costs_args]
+
+
+if __name__ == '__main__':
+    print('This module does not run as a script.')
@@ -0,0 +1,137 @@
+import pandas as pd
+from threading import Lock
+
+
+class ScenarioDimension:
+    """
+
+    The ScenarioDimension class is the dimension table of the combined scenarios built as the CCEMS reports are read. Each combined scenario (a pairing
+    of a Framework OEM scenario and a NonFramework OEM scenario) is given a compact integer Scenario ID so that the dictionary keys and joins of the cost
+    calculations use that integer rather than the long scenario name; the names are attached again when the results are written.
+
+    Note:
+        Scenario IDs are given before any report is read, in the model run and pair order of the scenarios found by the preflight check (see
+        add_pairings), so they do not depend on the order in which reports are read and are the same from one tool run to the next when the inputs
+        are the same. A scenario not found by the preflight check is given the next Scenario ID when it is first read. Reports may be read on a
+        background thread (see the prefetch_reports runtime setting), so the table is guarded by a lock.
+
+    """
+
+    cols = ['Scenario ID', 'Scenario Name', 'FWO Scenario Name', 'NFWO Scenario Name', 'Model Run']
+
+    def __init__(self):
+        self.rows = list()
+        self.ids = dict()
+        self.lock = Lock()
+
+    def add(self, scenario_name, framework_oem_scenario_name, nonframework_oem_scenario_name, model_run):
+        """
+
+        Parameters:
+            scenario_name: The name of the combined scenario.\n
+            framework_oem_scenario_name: The name of the Framework OEM scenario of the pairing.\n
+            nonframework_oem_scenario_name: The name of the NonFramework OEM scenario of the pairing.\n
+            model_run: The model_runs_path_dict key of the model run of the pairing.
+
+        Return:
+            The Scenario ID of the combined scenario; a scenario already in the table keeps the Scenario ID it was first given.
+
+        """
+        with self.lock:
+            if scenario_name not in self.ids:
+                self.ids[scenario_name] = len(self.rows)
+                self.rows.append((len(self.rows), scenario_name, framework_oem_scenario_name, nonframework_oem_scenario_name, model_run))
+            return self.ids[scenario_name]
+
+    def add_pairings(self, pairings):
+        """
+
+        Parameters:
+            pairings: A list of the (scenario_name, framework_oem_scenario_name, nonframework_oem_scenario_name, model_run) of each combined
+            scenario, as returned by the preflight check.
+
+        Return:
+            Nothing, but each combined scenario is added to the table in the order passed.
+
+        """
+        for pairing in pairings:
+            self.add(*pairing)
+
+    def id_of(self, scenario_name):
+        """
+
+        Parameters:
+            scenario_name: The name of a combined scenario.
+
+        Return:
+            The Scenario ID of the combined scenario.
+
+        """
+        with self.lock:
+            return self.ids[scenario_name]
+
+    def table(self):
+        """
+
+        Return:
+            A DataFrame of the Scenario ID, Scenario Name, FWO and NFWO scenario names and model run of each combined scenario.
+
+        """
+        with self.lock:
+            return pd.DataFrame(self.rows, columns=self.cols)
+
+    @staticmethod
+    def encoded_cols(cols):
+        """
+
+        Parameters:
+            cols: A list of column names.
+
+        Return:
+            The passed list with Scenario Name replaced by Scenario ID.
+
+        """
+        return ['Scenario ID' if col == 'Scenario Name' else col for col in cols]
+
+    def encode(self, df):
+        """
+
+        Parameters:
+            df: A DataFrame having a Scenario Name column.
+
+        Return:
+            A copy of the passed DataFrame with the Scenario Name column replaced by a Scenario ID column in the same position.
+
+        """
+        with self.lock:
+            ids = dict(self.ids)
+        unknown_names = set(df['Scenario Name'].unique()) - set(ids.keys())
+        if unknown_names:
+            raise KeyError(f'Scenario Name(s) {sorted(unknown_names)} not in the scenario dimension')
+        df = df.copy()
+        position = df.columns.get_loc('Scenario Name')
+        scenario_ids = df.pop('Scenario Name').astype(object).map(ids).astype('int64')
+        df.insert(position, 'Scenario ID', scenario_ids)
+        return df
+
+    def decode(self, df):
+        """
+
+        Parameters:
+            df: A DataFrame having a Scenario ID column.
+
+        Return:
+            A copy of the passed DataFrame with the Scenario ID column replaced by a Scenario Name column in the same position.
+
+        """
+        with self.lock:
+            names = [row[1] for row in self.rows]
+        df = df.copy()
+        position = df.columns.get_loc('Scenario ID')
+        scenario_names = df.pop('Scenario ID').astype('int64').map(dict(enumerate(names)))
+        df.insert(position, 'Scenario Name', scenario_names)
+        return df
+
+
+if __name__ == '__main__':
+    print('This module does not run as a script.')
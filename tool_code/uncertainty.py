@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from tool_code.cost_factors import stream_discount_rate
+from tool_code.discounting import discount_factor
+from tool_code.emission_costs import criteria_inventory, ghg_inventory
+
+
+def sum_by_factor_keys(scenario_ids, key_df, tons):
+    """
+
+    Parameters:
+        scenario_ids: An array of the Scenario ID of each row of an inventory.\n
+        key_df: A DataFrame of the cost factor keys of each row (e.g., Calendar Year, Reg-Class and fuel of the criteria cost factors).\n
+        tons: An array of (row, pollutant) of the inventory of each row.
+
+    Return:
+        A DataFrame of the unique cost factor keys; and an array of (Scenario ID, key, pollutant) of the inventory summed by scenario and key, so that
+        the factors of each draw are looked up once per key rather than once per row.
+
+    """
+    key_positions = key_df.groupby(by=key_df.columns.tolist(), sort=False, observed=True).ngroup().to_numpy()
+    keys = key_df.drop_duplicates().reset_index(drop=True)
+    tons_by_key = np.zeros((scenario_ids.max() + 1, len(keys), tons.shape[1]))
+    np.add.at(tons_by_key, (scenario_ids, key_positions), tons)
+    return keys, tons_by_key
+
+
+def discounted_emission_costs(settings, tons_by_key, years, factors, streams, disc_rate):
+    """
+    Note:
+        Emission costs are discounted by the discount_factor of discount_values at the discount rate of their stream, other than at a Disc-Rate of 0
+        where they are undiscounted, and summed over the calendar years as in calc_present_values.
+
+    Parameters:
+        settings: The SetInputs class.\n
+        tons_by_key: An array of (Scenario ID, key, pollutant) of the inventory summed by scenario and cost factor key.\n
+        years: An array of the calendar year of each key.\n
+        factors: An array of (key, pollutant, stream, draw) of the cost factors (dollars/ton) of each key in each draw.\n
+        streams: A list of the stream labels of the cost factors.\n
+        disc_rate: The Disc-Rate of the present values.
+
+    Return:
+        An array of (Scenario ID, stream, draw) of the present value of the emission costs (thousands of dollars) of each scenario in each draw.
+
+    """
+    rates = np.array([stream_discount_rate(stream) if disc_rate else 0 for stream in streams])
+    discount_factors = discount_factor(settings, years[:, np.newaxis], rates[np.newaxis, :])
+    return np.tensordot(tons_by_key, factors / discount_factors[:, np.newaxis, :, np.newaxis], axes=([1, 2], [0, 1])) / 1000
+
+
+def calc_uncertainty_report(settings, inv_df, present_values, no_action):
+    """
+    Note:
+        The present values of the criteria and GHG costs are calculated for every draw of the cost factors at once, along a draw axis, and the
+        present values of the costs and non-emission benefits, which do not depend on the cost factors, are taken once from the costs summary
+        present values. The net benefits of each draw are then those of calc_social_impacts through the last calendar year of the present values,
+        relative to the base_social_name scenario, for all reg classes.
+
+    Parameters:
+        settings: The SetInputs class.\n
+        inv_df: A DataFrame of the emission inventories of the costs summary report (see ReportStore.inventory_of). Scenarios are identified by the
+        Scenario ID of the ScenarioDimension.\n
+        present_values: A DataFrame of the present values of the costs summary report, with scenarios identified by Scenario ID.\n
+        no_action: The Scenario ID of the settings.base_social_name scenario.
+
+    Return:
+        A DataFrame of the settings.uncertainty_percentiles of the net benefits of each pairing of criteria and scc streams over the draws, by
+        Scenario ID and Disc-Rate.
+
+    """
+    draws = settings.emission_cost_factor_draws
+    central = draws.central
+    last_year = present_values['Calendar Year'].max()
+    present_values = present_values.loc[(present_values['Calendar Year'] == last_year) & (present_values['Reg-Class'] == 'TOTAL'), :]
+    present_values = present_values.sort_values(by=['Scenario ID', 'Disc-Rate']).reset_index(drop=True)
+
+    # the inventory of each scenario is summed by cost factor key over the calendar years of the present values
+    inv_df = inv_df.loc[inv_df['Scenario ID'].isin(present_values['Scenario ID'])
+                        & (inv_df['Calendar Year'] >= settings.discount_year) & (inv_df['Calendar Year'] <= last_year), :]
+    scenario_ids = inv_df['Scenario ID'].to_numpy(dtype=int)
+    fuel_types = inv_df['Fuel Type'].astype(object).replace({'E85': 'Gasoline', 'Hydrogen': 'Gasoline'})
+    criteria_key_df = pd.DataFrame({'Calendar Year': inv_df['Calendar Year'].to_numpy(dtype=int),
+                                    'Reg-Class': inv_df['Reg-Class'].astype(object).to_numpy(), 'Fuel Type': fuel_types.to_numpy()})
+    criteria_keys, criteria_tons = sum_by_factor_keys(scenario_ids, criteria_key_df, criteria_inventory(central, inv_df))
+    criteria_factors = draws.criteria_tensor(criteria_keys['Calendar Year'], criteria_keys['Reg-Class'], criteria_keys['Fuel Type'])
+
+    # the CO2 inventory is converted from million metric tons to metric tons
+    tons, to_metric_tons = ghg_inventory(central, inv_df)
+    scc_keys, scc_tons = sum_by_factor_keys(scenario_ids, criteria_key_df[['Calendar Year']], tons * to_metric_tons)
+    scc_factors = draws.scc_tensor(scc_keys['Calendar Year'])
+
+    # costs and non-emission benefits (and fuel savings) are shared by every draw
+    non_emission_net_benefits = (present_values['TotalFuelSavings'] + present_values['NonEmissionBenefits'] - present_values['TotalCosts']).to_numpy()
+
+    report = list()
+    for disc_rate in present_values['Disc-Rate'].unique():
+        rows = (present_values['Disc-Rate'] == disc_rate).to_numpy()
+        ids = present_values.loc[rows, 'Scenario ID'].to_numpy(dtype=int)
+        criteria_pvs = discounted_emission_costs(settings, criteria_tons, criteria_keys['Calendar Year'].to_numpy(), criteria_factors,
+                                                 list(central.criteria_streams), disc_rate)
+        scc_pvs = discounted_emission_costs(settings, scc_tons, scc_keys['Calendar Year'].to_numpy(), scc_factors, central.scc_streams, disc_rate)
+        delta_criteria = (criteria_pvs - criteria_pvs[no_action])[ids]
+        delta_scc = (scc_pvs - scc_pvs[no_action])[ids]
+
+        net_benefits = dict()
+        for criteria_index, arg_criteria in enumerate(settings.social_criteria_benefit_args):
+            for scc_index, arg_scc in enumerate(settings.social_scc_benefit_args):
+                values = non_emission_net_benefits[rows][:, np.newaxis] - delta_criteria[:, criteria_index, :] - delta_scc[:, scc_index, :]
+                net_benefits[f'NetBenefits_{arg_criteria}_{arg_scc}'] = \
+                    np.percentile(values, settings.uncertainty_percentiles, axis=1).T.ravel()
+        report.append(pd.DataFrame({'Scenario ID': np.repeat(ids, len(settings.uncertainty_percentiles)),
+                                    'Disc-Rate': disc_rate,
+                                    'Percentile': np.tile(settings.uncertainty_percentiles, len(ids)),
+                                    **net_benefits}))
+    return pd.concat(report, axis=0, ignore_index=True)
+
+
+if __name__ == '__main__':
+    print('This module does not run as a script.')